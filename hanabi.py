@@ -5,15 +5,154 @@ import string
 import json
 import datetime
 import re
+import weakref
 from time import sleep
 from collections import OrderedDict
+from functools import lru_cache
 
 import requests
 
 
+GAME_COLOURS = ["red", "yellow", "green", "blue", "white"]
+SCARCITY     = [0, 3, 2, 2, 2, 1]  # copies of each number in the deck, indexed by number
+
+# Cards are encoded as ints 0-49, indexing CARDS in the deck's canonical order. A card's
+# kind (colour_index * 5 + number - 1, so 0-24) identifies it without its serial.
+CARDS        = [(colour, number, serial) for colour in GAME_COLOURS
+                                         for number in range(1, 6)
+                                         for serial in range(SCARCITY[number])]
+CARD_IDS     = {card: card_id for card_id, card in enumerate(CARDS)}
+CARD_COLOUR  = [GAME_COLOURS.index(card[0]) for card in CARDS]
+CARD_NUMBER  = [card[1] for card in CARDS]
+CARD_KIND    = [colour * 5 + number - 1 for colour, number in zip(CARD_COLOUR, CARD_NUMBER)]
+KIND_IDS     = {card[:2]: kind for card, kind in zip(CARDS, CARD_KIND)}  # (colour, number): kind
+
+# What a player knows about a card is a 25 bit mask of the kinds it could be, which hints
+# narrow down by and-ing with a colour's or number's mask, or with its complement.
+CARD_BIT     = [1 << kind for kind in CARD_KIND]
+ALL_KINDS    = (1 << 25) - 1
+COLOUR_MASKS = [sum(1 << (colour * 5 + n) for n in range(5)) for colour in range(5)]
+NUMBER_MASKS = [sum(1 << (colour * 5 + n) for colour in range(5)) for n in range(5)]
+HINT_MASKS   = COLOUR_MASKS + NUMBER_MASKS  # indexed by a hint move's code % 10
+
+# Moves are encoded as ints: 0-4 play a hand slot, 5-9 discard one, then ten hints for each
+# other player in turn order after the mover, five colours then numbers 1-5.
+HAND_SIZE    = 5
+PLAY_MOVE    = 0
+DISCARD_MOVE = 5
+HINT_MOVE    = 10
+
+DEAL_CACHE_SIZE = 2 ** 14  # seeds whose shuffled deck is remembered, about 10MB when full
+SEED_CHARS      = string.ascii_letters + string.digits
+seed_rng        = random.SystemRandom()  # thread safe source of seeds for unseeded games
+
+
+def make_seed(rng):
+    """returns a five character seed drawn from the supplied random.Random stream"""
+    return ''.join(rng.choice(SEED_CHARS) for _ in range(5))
+
+
+def deal_rng(seed):
+    """returns a random.Random stream for seed, advanced past the shuffling of its deck"""
+    rng  = random.Random(seed)
+    deck = list(range(len(CARDS)))
+    rng.shuffle(deck)
+    return rng, deck
+
+
+@lru_cache(maxsize=DEAL_CACHE_SIZE)
+def shuffled_deal(seed):
+    """ returns (deck, next_seed) for seed, where deck is a tuple of card ids in dealing
+        order and next_seed is the first seed the game's own stream would draw afterwards
+    """
+    rng, deck = deal_rng(seed)
+    return tuple(deck), make_seed(rng)
+
+
+def next_seed(seed):
+    """returns the seed a bot run plays after seed, same as HanabiGame(n, seed).random_seed()"""
+    return shuffled_deal(seed)[1]
+
+
+def iter_seeds(seed, reps):
+    """yields the seeds of a reps long bot run starting from seed"""
+    for _ in range(reps):
+        yield seed
+        seed = next_seed(seed)
+
+
+def seed_sequence(seed, reps):
+    """returns the seeds of a reps long bot run starting from seed"""
+    return list(iter_seeds(seed, reps))
+
+
+def num_moves(num_players):
+    """returns the number of distinct move codes in a game of num_players"""
+    return HINT_MOVE + 10 * (num_players - 1)
+
+
+def info_dict(mask):
+    """builds the {'colour', 'number', 'not_colour', 'not_number'} dict from a knowledge mask"""
+    colours = [c for c, colour_mask in zip(GAME_COLOURS, COLOUR_MASKS) if mask & colour_mask]
+    numbers = [n for n, number_mask in zip(range(1, 6), NUMBER_MASKS) if mask & number_mask]
+    return {
+        'colour': colours[0] if len(colours) == 1 else None,
+        'number': numbers[0] if len(numbers) == 1 else None,
+        'not_number': set(range(1, 6)) - set(numbers) if len(numbers) > 1 else set(),
+        'not_colour': set(GAME_COLOURS) - set(colours) if len(colours) > 1 else set(),
+    }
+
+
+class HanabiInfoView():
+    """Presents a player's per-slot knowledge masks as the dict of info dicts keyed by card
+       tuple that render_info() and the bots expect
+    """
+    __slots__ = ('hanabi', 'player_id')
+
+    def __init__(self, hanabi, player_id):
+        self.hanabi    = hanabi
+        self.player_id = player_id
+
+    def __getitem__(self, card):
+        try:
+            idx = self.hanabi.hand_ids[self.player_id].index(CARD_IDS[card])
+        except ValueError:
+            raise KeyError(card)
+        return info_dict(self.hanabi.hand_masks[self.player_id][idx])
+
+    def __contains__(self, card):
+        return CARD_IDS.get(card) in self.hanabi.hand_ids[self.player_id]
+
+
 class HanabiGame():
-    """Administers a game of Hanabi"""
-    game_colours = ["red", "yellow", "green", "blue", "white"]
+    """Administers a game of Hanabi
+
+       Game state is kept as small ints: cards are ids into CARDS, the table is a height
+       per colour, the discard pile keeps a count per card kind and each hand slot has a
+       mask of the card kinds its owner knows it could be. The properties and info views below
+       rebuild the (colour, number, serial) tuples and info dicts the UI and bots work with.
+
+       Counts of each card kind are kept for the discard pile and for every hand, so how many
+       copies are discarded, on the table or visible to a player can be looked up directly.
+
+       The score, and the most it could still reach given what's been discarded, are kept
+       up to date as cards are played. With stop_early set the game ends once they meet.
+
+       Listeners added with subscribe() are told of each move as it happens, through their
+       on_play(player_id, hand_index, card, success), on_discard(player_id, hand_index, card),
+       on_inform(player_id, hand_id, hint_mask) and on_draw(player_id, card) methods, where
+       cards are ids. A play or discard is reported before the card drawn to replace it.
+
+       Each game has its own random streams, rng carries on from the shuffle of the deck and
+       bot_rng is kept for the players, so neither is shared with other games or threads.
+    """
+    __slots__ = ('lives', 'clocks', 'turn', 'final_turn', 'last_card_id', 'num_players',
+                 'seed', 'stop_early', 'points', 'reach', 'reach_points', 'deck_ids',
+                 'hand_ids', 'hand_masks', 'heights', 'discard_ids', 'discard_counts',
+                 'hand_counts', 'in_hand_counts', 'info', 'listeners', 'drew_next_seed', '_rng',
+                 '_bot_rng')
+
+    game_colours = GAME_COLOURS
     max_clocks   = 8
     score_translations = {
         0:  "horrible, booed by the crowd...",
@@ -24,29 +163,189 @@ class HanabiGame():
         25: "legendary, everyone left speechless, stars in their eyes",
     }
 
-    def __init__(self, num_players=2, seed=None):
-        self.lives        = 2
-        self.clocks       = 8
-        self.turn         = 0
-        self.final_turn   = None
-        self.last_card    = None
-        self.num_players  = num_players
-        self.seed         = seed if seed is not None else self.random_seed()
-        self.info         = [{} for _ in range(num_players)]
-        self.table        = [[(colour, 0)] for colour in self.game_colours]
-        self.discard_pile = []
-        self.hands        = [[] for _ in range(self.num_players)]
-        self.info         = [{} for _ in self.hands]
-        self.deck         = [(i, j, k) for i in self.game_colours
-                                       for j in range(1, 6)
-                                       for k in range(0, self.scarcity(j))]
-        random.seed(self.seed)
-        random.shuffle(self.deck)
-        [self.replenish_hand(i) for _ in range(5) for i, _ in enumerate(self.hands)]
-        # self.deck = self.deck[-3:] ## helpful to shorten deck for testing
+    def __init__(self, num_players=2, seed=None, stop_early=False):
+        self.lives          = 2
+        self.clocks         = 8
+        self.turn           = 0
+        self.final_turn     = None
+        self.last_card_id   = None
+        self.num_players    = num_players
+        self.stop_early     = stop_early
+        self.seed           = seed if seed is not None else make_seed(seed_rng)
+        self.drew_next_seed = False
+        self._rng           = None
+        self._bot_rng       = None
+        self.heights        = [0] * len(self.game_colours)
+        self.points         = 0
+        self.reach          = [5] * len(self.game_colours)  # highest each pile can still get
+        self.reach_points   = 25
+        self.discard_ids    = []
+        self.discard_counts = [0] * 25
+        self.hand_ids       = [[] for _ in range(num_players)]
+        self.hand_masks     = [[] for _ in range(num_players)]
+        self.hand_counts    = [[0] * 25 for _ in range(num_players)]
+        self.in_hand_counts = [0] * 25  # the sum of hand_counts
+        self.info           = [HanabiInfoView(self, i) for i in range(num_players)]
+        self.listeners      = None
+        self.deck_ids       = list(shuffled_deal(self.seed)[0])
+        [self.replenish_hand(i) for _ in range(HAND_SIZE) for i in range(num_players)]
+        # self.deck_ids = self.deck_ids[-3:] ## helpful to shorten deck for testing
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._rng = deal_rng(self.seed)[0]
+            if self.drew_next_seed:
+                make_seed(self._rng)  # catch up with the seed random_seed() took from the cache
+        return self._rng
+
+    @property
+    def bot_rng(self):
+        if self._bot_rng is None:
+            self._bot_rng = random.Random("{}:bots".format(self.seed))
+        return self._bot_rng
+
+    @property
+    def hands(self):
+        return [[CARDS[c] for c in hand] for hand in self.hand_ids]
+
+    @property
+    def deck(self):
+        return [CARDS[c] for c in self.deck_ids]
+
+    @property
+    def discard_pile(self):
+        return [CARDS[c] for c in self.discard_ids]
+
+    @property
+    def table(self):
+        return [[(colour, number) for number in range(height + 1)]
+                for colour, height in zip(self.game_colours, self.heights)]
+
+    @property
+    def last_card(self):
+        return CARDS[self.last_card_id] if self.last_card_id is not None else None
+
+    def subscribe(self, listener):
+        """ adds a listener to be told of moves until it's garbage collected, listeners aren't
+            told about restore() so look-ahead should use a clone()
+        """
+        if self.listeners is None:
+            self.listeners = weakref.WeakSet()
+        self.listeners.add(listener)
+
+    def notify(self, event, *args):
+        for listener in list(self.listeners):
+            getattr(listener, event)(*args)
+
+    def clone(self):
+        """ returns an independent copy of the game for look-ahead, without listeners, and
+            whose random streams are rebuilt from the seed if they're needed
+        """
+        other = object.__new__(type(self))
+        other.num_players    = self.num_players
+        other.seed           = self.seed
+        other.stop_early     = self.stop_early
+        other.drew_next_seed = self.drew_next_seed
+        other._rng           = None
+        other._bot_rng       = None
+        other.info           = [HanabiInfoView(other, i) for i in range(self.num_players)]
+        other.listeners      = None
+        other.restore(self.snapshot(), copy=False)
+        return other
+
+    def snapshot(self):
+        """ returns a copy of everything play, discard and inform can change, which restore()
+            puts back as many times as needed
+        """
+        return (self.lives, self.clocks, self.turn, self.final_turn, self.last_card_id,
+                self.points, self.reach_points, self.reach[:],
+                self.deck_ids[:], self.heights[:], self.discard_ids[:], self.discard_counts[:],
+                list(map(list.copy, self.hand_ids)),
+                list(map(list.copy, self.hand_masks)),
+                list(map(list.copy, self.hand_counts)), self.in_hand_counts[:])
+
+    def restore(self, snapshot, copy=True):
+        """returns the game to the state it was in when snapshot() was called"""
+        (self.lives, self.clocks, self.turn, self.final_turn, self.last_card_id,
+         self.points, self.reach_points, self.reach,
+         self.deck_ids, self.heights, self.discard_ids, self.discard_counts,
+         self.hand_ids, self.hand_masks, self.hand_counts, self.in_hand_counts) = snapshot
+        if copy:  # leave snapshot untouched so it can be restored again
+            self.reach          = self.reach[:]
+            self.deck_ids       = self.deck_ids[:]
+            self.heights        = self.heights[:]
+            self.discard_ids    = self.discard_ids[:]
+            self.discard_counts = self.discard_counts[:]
+            self.hand_ids       = list(map(list.copy, self.hand_ids))
+            self.hand_masks     = list(map(list.copy, self.hand_masks))
+            self.hand_counts    = list(map(list.copy, self.hand_counts))
+            self.in_hand_counts = self.in_hand_counts[:]
+
+    def legal_moves(self):
+        """ returns the codes of the moves the current player can make, in order, where hints
+            must be of a colour or number the hinted player holds
+        """
+        hand_size = len(self.hand_ids[self.turn % self.num_players])
+        moves     = list(range(PLAY_MOVE, PLAY_MOVE + hand_size))
+        if self.clocks < self.max_clocks:
+            moves += range(DISCARD_MOVE, DISCARD_MOVE + hand_size)
+        if self.clocks:
+            for offset in range(1, self.num_players):
+                held = 0
+                for card in self.hand_ids[(self.turn + offset) % self.num_players]:
+                    held |= CARD_BIT[card]
+                first = HINT_MOVE + 10 * (offset - 1)
+                moves += [first + value for value, mask in enumerate(HINT_MASKS) if mask & held]
+        return moves
+
+    def apply(self, move):
+        """makes the move with the supplied code for the current player"""
+        if move < DISCARD_MOVE:
+            self.play(move - PLAY_MOVE)
+        elif move < HINT_MOVE:
+            self.discard(move - DISCARD_MOVE)
+        else:
+            hint = move - HINT_MOVE
+            self.inform_mask((self.turn + 1 + hint // 10) % self.num_players, HINT_MASKS[hint % 10])
+
+    def move_code(self, move):
+        """returns the code for a current player's move string, such as 'pa', 'db' or '2g'"""
+        action, detail = move
+        if action == 'p':
+            return PLAY_MOVE + "abcde".index(detail)
+        if action == 'd':
+            return DISCARD_MOVE + "abcde".index(detail)
+        if not action.isdigit():
+            raise ValueError("illegal move : {}".format(move))
+        offset = (int(action) - 1 - self.current_player_id()) % self.num_players
+        if offset == 0 or int(action) > self.num_players:
+            raise ValueError("illegal move : {}".format(move))
+        colours = [colour[0] for colour in self.game_colours]
+        if detail.isdigit() and 1 <= int(detail) <= 5:
+            value = int(detail) + 4
+        elif detail in colours:
+            value = colours.index(detail)
+        else:
+            raise ValueError("illegal move : {}".format(move))
+        return HINT_MOVE + 10 * (offset - 1) + value
+
+    def move_string(self, move):
+        """returns the move string, such as 'pa', 'db' or '2g', for a current player's move code"""
+        if move < DISCARD_MOVE:
+            return 'p' + "abcde"[move - PLAY_MOVE]
+        if move < HINT_MOVE:
+            return 'd' + "abcde"[move - DISCARD_MOVE]
+        hint      = move - HINT_MOVE
+        player_id = (self.turn + 1 + hint // 10) % self.num_players
+        value     = hint % 10
+        info      = value - 4 if value >= 5 else self.game_colours[value][0]
+        return "{}{}".format(player_id + 1, info)
 
     def is_game_over(self):
-        return bool(self.end_message())
+        if self.lives < 0 or self.turn == self.final_turn or self.points == 25:
+            return True
+        return self.stop_early and self.points == self.max_score()
 
     def end_message(self):
         # todo - perhaps these should be enumerated as codes for something else to translate?
@@ -56,10 +355,19 @@ class HanabiGame():
             return "you used all the cards"
         if self.score() == 25:
             return "you completed the game"
-        # todo - game is over if all playable cards are in the discard pile
+        if self.stop_early and self.score() == self.max_score():
+            return "no more cards could be played"
 
     def score(self):
-        return sum(pile[-1][1] for pile in self.table)
+        return self.points
+
+    def max_score(self):
+        """ returns the highest score still reachable, given the cards lost to the discard
+            pile and, once the deck is empty, the turns left to play cards in
+        """
+        if self.final_turn is None:
+            return self.reach_points
+        return min(self.reach_points, self.points + self.final_turn - self.turn)
 
     def score_meaning(self):
         meanings_attained = ((score, meaning) for (score, meaning)
@@ -69,10 +377,13 @@ class HanabiGame():
         return meaning_score[1]
 
     def scarcity(self, number):
-        return 1 if number == 5 else 3 if number == 1 else 2
+        return SCARCITY[number]
 
     def random_seed(self):
-        return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(5))
+        if self._rng is None and not self.drew_next_seed:
+            self.drew_next_seed = True
+            return next_seed(self.seed)  # the cached deal knows the stream's first seed
+        return make_seed(self.rng)
 
     def current_player_id(self):
         return self.turn % self.num_players
@@ -81,27 +392,47 @@ class HanabiGame():
         return (self.current_player_id() + 1) % self.num_players
 
     def current_hand(self):
-        return self.hands[self.current_player_id()]
+        return [CARDS[c] for c in self.hand_ids[self.current_player_id()]]
 
     def next_hand(self):
-        return self.hands[self.next_player_id()]
+        return [CARDS[c] for c in self.hand_ids[self.next_player_id()]]
 
     def playable_cards(self):
-        return [(pile[0][0], pile[-1][1] + 1) for pile in self.table if pile[-1][1] != 5]
+        return [(colour, height + 1) for colour, height in zip(self.game_colours, self.heights)
+                if height != 5]
+
+    def count_discarded(self, kind):
+        return self.discard_counts[kind]
+
+    def count_on_table(self, kind):
+        """returns 1 if the card kind has been played, else 0"""
+        return int(self.heights[kind // 5] > kind % 5)
+
+    def count_visible(self, player_id, kind):
+        """returns how many cards of a kind are in hands other than player_id's"""
+        return self.in_hand_counts[kind] - self.hand_counts[player_id][kind]
 
     def possible_info(self, hand_id, type='colour'):
-        return set([card[0 if type == 'colour' else 1] for card in self.hands[hand_id]])
+        if type == 'colour':
+            return set(self.game_colours[CARD_COLOUR[c]] for c in self.hand_ids[hand_id])
+        return set(CARD_NUMBER[c] for c in self.hand_ids[hand_id])
 
     def play(self, hand_index):
-        card = self.take_hand_card(hand_index)
-        pile = self.table[self.game_colours.index(card[0])]
-        if (len(pile) == 0 and card[1] == 1) or (pile[-1][1] == card[1] - 1):
-            pile.append(card)
-            if card[1] == 5:
+        player_id = self.turn % self.num_players
+        card      = self.take_hand_card(hand_index)
+        colour    = CARD_COLOUR[card]
+        success   = self.heights[colour] == CARD_NUMBER[card] - 1
+        if success:
+            self.heights[colour] += 1
+            self.points += 1
+            if CARD_NUMBER[card] == 5:
                 self.add_clock()
         else:
             self.lives -= 1
-            self.discard_pile.append(card)
+            self.add_discard(card)
+        if self.listeners:
+            self.notify('on_play', player_id, hand_index, card, success)
+        self.replenish_hand(player_id)
         self.turn += 1
 
     def at_max_clocks(self):
@@ -109,55 +440,73 @@ class HanabiGame():
 
     def discard(self, hand_index):
         assert not self.at_max_clocks(), "can't discard if clocks are full"
-        card = self.take_hand_card(hand_index)
-        self.discard_pile.append(card)
+        player_id = self.turn % self.num_players
+        card      = self.take_hand_card(hand_index)
+        self.add_discard(card)
         self.add_clock()
+        if self.listeners:
+            self.notify('on_discard', player_id, hand_index, card)
+        self.replenish_hand(player_id)
         self.turn += 1
 
+    def add_discard(self, card):
+        kind = CARD_KIND[card]
+        self.discard_ids.append(card)
+        self.discard_counts[kind] += 1
+        number = CARD_NUMBER[card]
+        if self.discard_counts[kind] == SCARCITY[number]:  # that was the last copy
+            colour = CARD_COLOUR[card]
+            if self.reach[colour] >= number:
+                self.reach_points -= self.reach[colour] - number + 1
+                self.reach[colour] = number - 1
+
     def inform(self, hand_id, info):
+        """applies a one-word hint such as '3' or 'green' to hand_id's cards"""
+        if info.isdigit():
+            self.inform_number(hand_id, int(info))
+        else:
+            self.inform_colour(hand_id, self.game_colours.index(info))
+
+    def inform_colour(self, hand_id, colour):
+        self.inform_mask(hand_id, COLOUR_MASKS[colour])
+
+    def inform_number(self, hand_id, number):
+        self.inform_mask(hand_id, NUMBER_MASKS[number - 1])
+
+    def inform_mask(self, hand_id, hint_mask):
+        """tells hand_id which of their cards are, and which aren't, among hint_mask's kinds"""
         assert self.clocks > 0, "can't give info without clocks"
-        for card in self.hands[hand_id]:
-            hand_info = self.info[hand_id][card]
-            if card[0] == info:
-                hand_info['colour'] = info
-                hand_info['not_colour'] = set()
-            elif info.isdigit() and card[1] == int(info):
-                hand_info['number'] = int(info)
-                hand_info['not_number'] = set()
-            elif info.isdigit() and not hand_info['number']:
-                nn = hand_info['not_number']
-                nn.add(int(info))
-                if len(nn) == 4:  # four is-nots = one is!
-                    hand_info['number']     = list(set(range(1, 6)) - nn)[0]
-                    hand_info['not_number'] = set()
-            elif not info.isdigit() and not hand_info['colour']:
-                nc = hand_info['not_colour']
-                nc.add(info)
-                if len(nc) == 4:  # four is-nots = one is!
-                    hand_info['colour']     = list(set(self.game_colours) - nc)[0]
-                    hand_info['not_colour'] = set()
+        not_hint_mask = ~hint_mask
+        masks         = self.hand_masks[hand_id]
+        for i, card in enumerate(self.hand_ids[hand_id]):
+            masks[i] &= hint_mask if CARD_BIT[card] & hint_mask else not_hint_mask
         self.clocks -= 1
+        if self.listeners:
+            self.notify('on_inform', self.turn % self.num_players, hand_id, hint_mask)
         self.turn += 1
 
     def take_hand_card(self, hand_index):
-        card = self.current_hand().pop(hand_index)
-        self.last_card = card
-        self.replenish_hand(self.current_player_id())
+        """removes a card from the current hand, without replacing it, and returns it"""
+        player_id = self.turn % self.num_players
+        card      = self.hand_ids[player_id].pop(hand_index)
+        del self.hand_masks[player_id][hand_index]
+        self.hand_counts[player_id][CARD_KIND[card]] -= 1
+        self.in_hand_counts[CARD_KIND[card]] -= 1
+        self.last_card_id = card
         return card
 
     def add_clock(self):
         self.clocks += 1 if self.clocks < self.max_clocks else 0
 
     def replenish_hand(self, player_id):
-        if len(self.deck):
-            card = self.deck.pop()
-            self.hands[player_id].append(card)
-            self.info[player_id][card] = {
-                'colour': None,
-                'number': None,
-                'not_number': set(),
-                'not_colour': set(),
-            }
+        if self.deck_ids:
+            card = self.deck_ids.pop()
+            self.hand_ids[player_id].append(card)
+            self.hand_masks[player_id].append(ALL_KINDS)
+            self.hand_counts[player_id][CARD_KIND[card]] += 1
+            self.in_hand_counts[CARD_KIND[card]] += 1
+            if self.listeners:
+                self.notify('on_draw', player_id, card)
         elif not self.final_turn:
             self.final_turn = self.turn + self.num_players
 
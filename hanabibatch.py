@@ -0,0 +1,229 @@
+"""NumPy backed engine playing many games of Hanabi in lockstep"""
+import numpy as np
+
+from hanabi import HanabiGame, CARDS, CARD_BIT, CARD_COLOUR, CARD_NUMBER, CARD_KIND, SCARCITY, \
+    HAND_SIZE, PLAY_MOVE, DISCARD_MOVE, HINT_MOVE, ALL_KINDS, HINT_MASKS, num_moves, \
+    shuffled_deal
+
+# Card lookups take -1 for an empty hand slot, which indexes the trailing dummy entry
+COLOUR_OF  = np.array(CARD_COLOUR + [0], dtype=np.int8)
+NUMBER_OF  = np.array(CARD_NUMBER + [0], dtype=np.int8)
+KIND_OF    = np.array(CARD_KIND + [0], dtype=np.int8)
+BIT_OF     = np.array(CARD_BIT + [0], dtype=np.int32)
+SCARCITIES = np.array(SCARCITY[1:], dtype=np.int8)
+SLOTS      = np.arange(HAND_SIZE)
+
+HINT_MASK_ARRAY = np.array(HINT_MASKS, dtype=np.int32)
+
+
+class BatchHanabiGame():
+    """ Administers a batch of games with the same number of players, one per seed, as arrays
+        with a row per game. apply() takes a move code per game (see hanabi.py) and plays
+        them all at once, finished games ignore their move.
+
+        Games are dealt the same cards as HanabiGame and follow the same rules, so a game
+        here matches HanabiGame(num_players, seed, stop_early) given the same moves.
+    """
+    max_clocks = HanabiGame.max_clocks
+
+    def __init__(self, num_players, seeds, rng_seed=None, stop_early=False):
+        num_games        = len(seeds)
+        self.num_players = num_players
+        self.stop_early  = stop_early
+        self.seeds       = list(seeds)
+        self.games       = np.arange(num_games)
+        self.rng         = np.random.default_rng(rng_seed)  # for bots, the deals don't use it
+        self.deck        = np.zeros((num_games, len(CARDS)), np.int8)
+        self.deck_size   = np.zeros(num_games, np.int16)
+        self.lives       = np.zeros(num_games, np.int8)
+        self.clocks      = np.zeros(num_games, np.int8)
+        self.turn        = np.zeros(num_games, np.int16)
+        self.final_turn  = np.zeros(num_games, np.int16)
+        self.heights     = np.zeros((num_games, 5), np.int8)
+        self.discards    = np.zeros((num_games, 25), np.int8)
+        self.reach       = np.zeros((num_games, 5), np.int8)  # highest each pile can get
+        self.hands       = np.zeros((num_games, num_players, HAND_SIZE), np.int8)
+        self.knowledge   = np.zeros((num_games, num_players, HAND_SIZE), np.int32)
+        self.done        = np.zeros(num_games, bool)
+        self.deal(self.games, self.seeds)
+
+    def deal(self, games, seeds):
+        """starts a new game from each seed in the rows games, as a new batch would"""
+        deck = np.array([shuffled_deal(seed)[0] for seed in seeds], dtype=np.int8)
+        self.deck[games]       = deck.reshape(len(games), len(CARDS))
+        self.deck_size[games]  = len(CARDS) - HAND_SIZE * self.num_players
+        self.lives[games]      = 2
+        self.clocks[games]     = self.max_clocks
+        self.turn[games]       = 0
+        self.final_turn[games] = -1
+        self.heights[games]    = 0
+        self.discards[games]   = 0
+        self.reach[games]      = 5
+        self.knowledge[games]  = ALL_KINDS
+        self.done[games]       = False
+        for game, seed in zip(games, seeds):
+            self.seeds[game] = seed
+
+        # deal as HanabiGame does, a card each in turn popped from the end of the deck
+        dealt      = SLOTS[None, :] * self.num_players + np.arange(self.num_players)[:, None]
+        deal_order = len(CARDS) - 1 - dealt
+        self.hands[games] = self.deck[games][:, deal_order]
+
+    def scores(self):
+        return self.heights.sum(axis=1)
+
+    def max_scores(self):
+        """returns the highest score each game can still reach, as HanabiGame.max_score()"""
+        reach_scores = self.reach.sum(axis=1)
+        turns_left   = self.final_turn - self.turn
+        return np.where(self.final_turn < 0, reach_scores,
+                        np.minimum(reach_scores, self.scores() + turns_left))
+
+    def current_players(self):
+        return self.turn % self.num_players
+
+    def current_hands(self):
+        """returns the card ids in each game's current hand, -1 for empty slots"""
+        return self.hands[self.games, self.current_players()]
+
+    def next_hands(self):
+        return self.hands[self.games, (self.turn + 1) % self.num_players]
+
+    def legal_moves_mask(self, out=None):
+        """ returns a bool array with a row per game and a column per move code, written into
+            out if it's given. As in HanabiGame, hints must touch a card of the hinted hand.
+        """
+        has_card = self.current_hands() >= 0
+        mask = np.zeros((len(self.games), num_moves(self.num_players)), bool) if out is None \
+            else out
+        mask[:, PLAY_MOVE:PLAY_MOVE + HAND_SIZE]       = has_card
+        mask[:, DISCARD_MOVE:DISCARD_MOVE + HAND_SIZE] = has_card & \
+                                                         (self.clocks < self.max_clocks)[:, None]
+        has_clock = (self.clocks > 0)[:, None]
+        for offset in range(1, self.num_players):
+            hands = self.hands[self.games, (self.turn + offset) % self.num_players]
+            held  = np.bitwise_or.reduce(BIT_OF[hands], axis=1)
+            first = HINT_MOVE + 10 * (offset - 1)
+            mask[:, first:first + 10] = has_clock & (held[:, None] & HINT_MASK_ARRAY != 0)
+        mask[self.done]     = False
+        return mask
+
+    def card_numbers(self, cards):
+        """returns the numbers of an array of card ids, 0 for empty slots"""
+        return NUMBER_OF[cards]
+
+    def is_playable(self, cards):
+        """returns whether each card id in an array with a row per game can be played now"""
+        heights = np.take_along_axis(self.heights, COLOUR_OF[cards], axis=1)
+        return (cards >= 0) & (heights == NUMBER_OF[cards] - 1)
+
+    def is_junk(self, cards):
+        """returns whether each card id can no longer add to its game's score"""
+        colours = COLOUR_OF[cards]
+        heights = np.take_along_axis(self.heights, colours, axis=1)
+        reach   = np.take_along_axis(self.reach, colours, axis=1)
+        numbers = NUMBER_OF[cards]
+        return (cards >= 0) & ((numbers <= heights) | (numbers > reach))
+
+    def copies_left(self, cards):
+        """returns how many copies of each card's kind haven't been discarded"""
+        kinds = KIND_OF[cards]
+        return SCARCITIES[kinds % 5] - np.take_along_axis(self.discards, kinds, axis=1)
+
+    def apply(self, moves):
+        moves    = np.asarray(moves)
+        active   = ~self.done
+        in_range = (moves >= 0) & (moves < num_moves(self.num_players))
+        assert in_range[active].all(), "move codes out of range for games {}".format(
+            list(self.games[active & ~in_range]))
+        legal    = self.legal_moves_mask()[self.games, np.where(in_range, moves, 0)]
+        assert legal[active].all(), "illegal moves for games {}".format(
+            list(self.games[active & ~legal]))
+
+        plays = self.games[active & (moves < DISCARD_MOVE)]
+        if len(plays):
+            self.play(plays, moves[plays] - PLAY_MOVE)
+        discards = self.games[active & (moves >= DISCARD_MOVE) & (moves < HINT_MOVE)]
+        if len(discards):
+            self.discard(discards, moves[discards] - DISCARD_MOVE)
+        hints = self.games[active & (moves >= HINT_MOVE)]
+        if len(hints):
+            self.inform(hints, moves[hints] - HINT_MOVE)
+
+        self.turn[active] += 1
+        scores = self.scores()
+        self.done |= (self.lives < 0) | (self.turn == self.final_turn) | (scores == 25)
+        if self.stop_early:
+            self.done |= scores == self.max_scores()
+
+    def play(self, games, slots):
+        cards   = self.take_hand_cards(games, slots)
+        colours = COLOUR_OF[cards]
+        numbers = NUMBER_OF[cards]
+        fits    = self.heights[games, colours] == numbers - 1
+        self.heights[games[fits], colours[fits]] += 1
+        fives   = games[fits & (numbers == 5)]
+        self.clocks[fives] = np.minimum(self.clocks[fives] + 1, self.max_clocks)
+        misses  = games[~fits]
+        self.lives[misses] -= 1
+        self.add_discards(misses, cards[~fits])
+
+    def discard(self, games, slots):
+        cards = self.take_hand_cards(games, slots)
+        self.add_discards(games, cards)
+        self.clocks[games] = np.minimum(self.clocks[games] + 1, self.max_clocks)
+
+    def add_discards(self, games, cards):
+        """counts cards into the discards, lowering reach where the last copy has gone"""
+        kinds = KIND_OF[cards]
+        self.discards[games, kinds] += 1
+        lost    = self.discards[games, kinds] >= SCARCITIES[kinds % 5]
+        colours = COLOUR_OF[cards[lost]]
+        self.reach[games[lost], colours] = np.minimum(self.reach[games[lost], colours],
+                                                      NUMBER_OF[cards[lost]] - 1)
+
+    def inform(self, games, hints):
+        """ applies hint numbers 0-9 (as in move codes) to the hands they're given to, where
+            each ten counts a player further round the table
+        """
+        targets   = (self.turn[games] + 1 + hints // 10) % self.num_players
+        values    = hints % 10
+        cards     = self.hands[games, targets]
+        attrs     = np.where(values[:, None] < 5, COLOUR_OF[cards], NUMBER_OF[cards] + 4)
+        masks     = HINT_MASK_ARRAY[values][:, None]
+        knowledge = self.knowledge[games, targets]
+        self.knowledge[games, targets] = np.where(attrs == values[:, None],
+                                                  knowledge & masks, knowledge & ~masks)
+        self.clocks[games] -= 1
+
+    def take_hand_cards(self, games, slots):
+        """removes cards from the current hands, drawing replacements, and returns the cards"""
+        players   = self.turn[games] % self.num_players
+        hands     = self.hands[games, players]
+        cards     = hands[np.arange(len(games)), slots]
+        shift     = np.minimum(SLOTS + (SLOTS >= slots[:, None]), HAND_SIZE - 1)
+        hands     = np.take_along_axis(hands, shift, axis=1)
+        knowledge = np.take_along_axis(self.knowledge[games, players], shift, axis=1)
+
+        has_deck  = self.deck_size[games] > 0
+        hands[:, -1]     = np.where(has_deck, self.deck[games, self.deck_size[games] - 1], -1)
+        knowledge[:, -1] = np.where(has_deck, ALL_KINDS, 0)
+        self.deck_size[games] -= has_deck
+        ending = games[~has_deck & (self.final_turn[games] < 0)]
+        self.final_turn[ending] = self.turn[ending] + self.num_players
+
+        self.hands[games, players]     = hands
+        self.knowledge[games, players] = knowledge
+        return cards
+
+
+def play_batch(bot_class, num_players, seeds, rng_seed=None, stop_early=False):
+    """ plays a game per seed with bot_class's batched strategy, returning the finished batch.
+        Raises ValueError if bot_class has no get_batch_moves().
+    """
+    if not hasattr(bot_class, 'get_batch_moves'):
+        raise ValueError("{} has no batched strategy".format(bot_class.__name__))
+    batch = BatchHanabiGame(num_players, seeds, rng_seed, stop_early)
+    while not batch.done.all():
+        batch.apply(bot_class.get_batch_moves(batch))
+    return batch
@@ -0,0 +1,157 @@
+"""Beliefs a player can hold about the cards in their own hand, kept up to date move by move
+
+   Each slot of the hand gets a chance of being each of the 25 card kinds: the kinds its
+   owner has been told it could be, weighted by how many copies of each they can't see, that
+   is copies not yet discarded, played or in another player's hand. Cards in the same hand
+   are taken to be independent, so a slot's chances don't allow for what the others hold.
+
+   HanabiBeliefs subscribes to the game and adjusts the weights it keeps per slot as each
+   move is reported, rather than recounting every slot, so asking how likely a slot is to be
+   playable or junk is a division. Junk is any kind that can never be played, as it already
+   has been or every copy of a lower card of its colour has been discarded. Like bots, it
+   only follows the moves of the game it was made for, not restore(), so it shouldn't be made
+   on a game that look-ahead rewinds.
+"""
+from hanabi import SCARCITY, CARD_KIND, ALL_KINDS
+
+
+def kinds_in(mask):
+    return [kind for kind in range(25) if mask >> kind & 1]
+
+
+class HanabiBeliefs():
+    """ The chances of each card kind for each slot of player_id's hand in hanabi
+
+        unseen counts the copies of each kind player_id can't see, and for each slot totals,
+        playable and junk are the sums of unseen over the kinds its mask allows, over those
+        of them that can be played next and over those that never can be
+    """
+
+    def __init__(self, hanabi, player_id):
+        self._hanabi       = hanabi
+        self.player_id     = player_id
+        self.unseen        = [SCARCITY[kind % 5 + 1] - self.count_seen(kind) for kind in range(25)]
+        self.playable_mask = sum(1 << (colour * 5 + height)
+                                 for colour, (height, reach)
+                                 in enumerate(zip(hanabi.heights, hanabi.reach)) if height < reach)
+        self.junk_mask     = sum(1 << (colour * 5 + n)
+                                 for colour, (height, reach)
+                                 in enumerate(zip(hanabi.heights, hanabi.reach))
+                                 for n in range(5) if n < height or n >= reach)
+        self.masks         = []
+        self.totals        = []
+        self.playable      = []
+        self.junk          = []
+        for mask in hanabi.hand_masks[player_id]:
+            self.add_slot(mask)
+        hanabi.subscribe(self)
+
+    def count_seen(self, kind):
+        hanabi = self._hanabi
+        return hanabi.count_discarded(kind) + hanabi.count_on_table(kind) + \
+            hanabi.count_visible(self.player_id, kind)
+
+    def add_slot(self, mask):
+        self.masks.append(mask)
+        self.totals.append(0)
+        self.playable.append(0)
+        self.junk.append(0)
+        self.recount(len(self.masks) - 1)
+
+    def recount(self, slot):
+        """works out a slot's sums from scratch, after its mask has changed"""
+        mask                = self.masks[slot]
+        unseen              = self.unseen
+        self.totals[slot]   = sum(unseen[kind] for kind in kinds_in(mask))
+        self.playable[slot] = sum(unseen[kind] for kind in kinds_in(mask & self.playable_mask))
+        self.junk[slot]     = sum(unseen[kind] for kind in kinds_in(mask & self.junk_mask))
+
+    def drop_slot(self, slot):
+        for weights in (self.masks, self.totals, self.playable, self.junk):
+            del weights[slot]
+
+    def see(self, kind):
+        """takes a copy of kind out of those player_id can't see"""
+        bit               = 1 << kind
+        self.unseen[kind] -= 1
+        playable, junk    = self.playable_mask & bit, self.junk_mask & bit
+        for slot, mask in enumerate(self.masks):
+            if mask & bit:
+                self.totals[slot] -= 1
+                if playable:
+                    self.playable[slot] -= 1
+                elif junk:
+                    self.junk[slot] -= 1
+
+    def played(self, kind):
+        """moves kind from playable to junk, and the next kind of its colour to playable"""
+        bit                 = 1 << kind
+        after               = bit << 1 & ~self.junk_mask if kind % 5 < 4 else 0
+        self.playable_mask  = self.playable_mask & ~bit | after
+        self.junk_mask     |= bit
+        for slot, mask in enumerate(self.masks):
+            if mask & bit:
+                self.playable[slot] -= self.unseen[kind]
+                self.junk[slot]     += self.unseen[kind]
+            if mask & after:
+                self.playable[slot] += self.unseen[kind + 1]
+
+    def discarded(self, kind):
+        """makes kind and the kinds above it in its colour junk if that was its last copy"""
+        if self._hanabi.count_discarded(kind) < SCARCITY[kind % 5 + 1]:
+            return
+        dead = sum(1 << (kind + n) for n in range(5 - kind % 5)) & ~self.junk_mask
+        for slot, mask in enumerate(self.masks):
+            for each in kinds_in(mask & dead):
+                if self.playable_mask >> each & 1:
+                    self.playable[slot] -= self.unseen[each]
+                self.junk[slot] += self.unseen[each]
+        self.playable_mask &= ~dead
+        self.junk_mask     |= dead
+
+    def on_play(self, player_id, hand_index, card, success):
+        if player_id == self.player_id:
+            self.drop_slot(hand_index)
+            self.see(CARD_KIND[card])
+        if success:
+            self.played(CARD_KIND[card])
+        else:
+            self.discarded(CARD_KIND[card])
+
+    def on_discard(self, player_id, hand_index, card):
+        if player_id == self.player_id:
+            self.drop_slot(hand_index)
+            self.see(CARD_KIND[card])
+        self.discarded(CARD_KIND[card])
+
+    def on_inform(self, player_id, hand_id, hint_mask):
+        if hand_id != self.player_id:
+            return
+        for slot, mask in enumerate(self._hanabi.hand_masks[hand_id]):
+            if mask != self.masks[slot]:
+                self.masks[slot] = mask
+                self.recount(slot)
+
+    def on_draw(self, player_id, card):
+        if player_id == self.player_id:
+            self.add_slot(ALL_KINDS)
+        else:
+            self.see(CARD_KIND[card])
+
+    def chance(self, slot, kind):
+        """returns the chance the card in slot is of kind"""
+        if not self.masks[slot] >> kind & 1:
+            return 0.0
+        return self.unseen[kind] / self.totals[slot]
+
+    def distribution(self, slot):
+        """returns the chance of the card in slot being each card kind, as a list of 25"""
+        return [self.chance(slot, kind) for kind in range(25)]
+
+    def playable_chance(self, slot):
+        """returns the chance the card in slot can be played now"""
+        return self.playable[slot] / self.totals[slot]
+
+    def junk_chance(self, slot):
+        """returns the chance the card in slot can never be played, so is safe to discard"""
+        return self.junk[slot] / self.totals[slot]
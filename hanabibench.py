@@ -0,0 +1,232 @@
+"""Timing benchmarks for the HanabiGame engine and the bots
+
+   run as `python hanabibench.py [num_players] [num_games]`, add `--save FILE` to keep the
+   timings as a baseline and `--compare FILE` to flag any that have got slower since
+"""
+import sys
+import json
+import argparse
+import platform
+from time import perf_counter
+
+from hanabi import HanabiGame, shuffled_deal
+from hanabibot import HanabiCheatBot
+from hanabibatch import play_batch
+from hanabirunner import run_games
+import hanabibot
+
+THRESHOLD = 0.1  # fraction a timing can grow by before --compare calls it a regression
+REPEAT    = 3    # runs of each benchmark, the quickest of which is kept
+
+
+def scripted_moves(hanabi):
+    """ plays out hanabi with a fixed policy that needs no bot, returning the moves made as
+        (method name, args) tuples so they can be replayed against a fresh game
+    """
+    moves = []
+    while not hanabi.is_game_over():
+        turn    = hanabi.turn
+        next_id = hanabi.next_player_id()
+        if hanabi.clocks and turn % 3:
+            move = ('inform', (next_id, str(turn % 5 + 1) if turn % 2 else
+                                        hanabi.game_colours[turn % 5]))
+        elif not hanabi.at_max_clocks():
+            move = ('discard', (turn % len(hanabi.current_hand()),))
+        else:
+            move = ('play', (0,))
+        getattr(hanabi, move[0])(*move[1])
+        moves.append(move)
+    return moves
+
+
+def bot_classes():
+    """returns the bots that play as fast as they can, not those given time for each move"""
+    bots = [getattr(hanabibot, name) for name in dir(hanabibot) if name.endswith("Bot")]
+    return [bot for bot in bots if getattr(bot, 'time_budget', None) is None]
+
+
+def timer_overhead(samples=10000):
+    """returns the seconds a pair of perf_counter() calls adds to anything timed between them"""
+    start = perf_counter()
+    for _ in range(samples):
+        perf_counter()
+        perf_counter()
+    return (perf_counter() - start) / samples
+
+
+def time_deals(num_players, seeds, cached=False):
+    """ returns seconds taken to set up a game for each seed, with the deal cache emptied
+        first unless cached is set
+    """
+    if not cached:
+        shuffled_deal.cache_clear()
+    start = perf_counter()
+    for seed in seeds:
+        HanabiGame(num_players, seed)
+    return perf_counter() - start
+
+
+def time_steps(num_players, seeds):
+    """ returns (seconds, steps) taken to replay scripted games for each seed, where a step
+        is one move plus the game over check made before it
+    """
+    scripts = [scripted_moves(HanabiGame(num_players, seed)) for seed in seeds]
+    games   = [HanabiGame(num_players, seed) for seed in seeds]
+    steps   = sum(len(moves) for moves in scripts)
+    start   = perf_counter()
+    for hanabi, moves in zip(games, scripts):
+        for name, args in moves:
+            hanabi.is_game_over()
+            getattr(hanabi, name)(*args)
+    return perf_counter() - start, steps
+
+
+def time_moves(num_players, seeds):
+    """ returns {method name: (seconds, calls)} for play, discard and inform over replays of
+        scripted games for each seed, with the cost of timing each call taken off
+    """
+    scripts  = [scripted_moves(HanabiGame(num_players, seed)) for seed in seeds]
+    games    = [HanabiGame(num_players, seed) for seed in seeds]
+    timings  = {name: [0.0, 0] for name in ('play', 'discard', 'inform')}
+    overhead = timer_overhead()
+    for hanabi, moves in zip(games, scripts):
+        for name, args in moves:
+            method = getattr(hanabi, name)
+            start  = perf_counter()
+            method(*args)
+            timing     = timings[name]
+            timing[0] += perf_counter() - start - overhead
+            timing[1] += 1
+    return {name: tuple(timing) for name, timing in timings.items()}
+
+
+def time_bot_setup(bot_class, num_players, seeds):
+    """returns seconds taken to make a bot for each seat at each turn of scripted games"""
+    total, count = 0.0, 0
+    for seed in seeds:
+        hanabi = HanabiGame(num_players, seed)
+        for name, args in scripted_moves(hanabi.clone()):
+            start  = perf_counter()
+            [bot_class(hanabi, player_id=p) for p in range(num_players)]
+            total += perf_counter() - start
+            count += num_players
+            getattr(hanabi, name)(*args)
+    return total, count
+
+
+def time_get_moves(bot_class, num_players, seeds):
+    """returns (seconds, calls) spent in get_move() while bot_class plays a game per seed"""
+    overhead     = timer_overhead()
+    total, count = 0.0, 0
+    for seed in seeds:
+        hanabi = HanabiGame(num_players, seed)
+        bots   = [bot_class(hanabi, player_id=p) for p in range(num_players)]
+        while not hanabi.is_game_over():
+            bot    = bots[hanabi.current_player_id()]
+            start  = perf_counter()
+            move   = bot.get_move()
+            total += perf_counter() - start - overhead
+            count += 1
+            hanabi.apply(hanabi.move_code(move) if isinstance(move, str) else move)
+    return total, count
+
+
+def time_games(bot_class, num_players, seeds):
+    """returns seconds taken for bot_class to play a game per seed in this process"""
+    start = perf_counter()
+    run_games(bot_class, num_players, seeds=seeds, workers=1)
+    return perf_counter() - start
+
+
+def time_batch(bot_class, num_players, seeds):
+    """returns seconds taken to play a game per seed with bot_class's batched strategy"""
+    start = perf_counter()
+    play_batch(bot_class, num_players, seeds)
+    return perf_counter() - start
+
+
+def run_suite(num_players, num_games, repeat=REPEAT):
+    """ returns {benchmark name: {'us': microseconds, 'per': unit}} for the whole suite, taking
+        the quickest of repeat runs of each. Every figure is a time, so lower is better.
+    """
+    seeds   = ["{:05d}".format(i) for i in range(num_games)]
+    results = {}
+
+    def record(name, unit, bench, *args):
+        """times bench(*args), which returns seconds or (seconds, count) for count units"""
+        timings = []
+        for _ in range(repeat):
+            timing = bench(*args)
+            timings.append(timing if isinstance(timing, tuple) else (timing, num_games))
+        seconds, count = min(timings)
+        results[name] = {'us': 1e6 * seconds / count, 'per': unit}
+
+    def move_timings(name):
+        return time_moves(num_players, seeds)[name]
+
+    record('deal', 'game', time_deals, num_players, seeds)
+    record('deal_cached', 'game', time_deals, num_players, seeds, True)
+    record('step', 'step', time_steps, num_players, seeds)
+    for name in ('play', 'discard', 'inform'):
+        record(name, 'call', move_timings, name)
+    for bot_class in bot_classes():
+        bot_name = bot_class.__name__
+        record(bot_name + '.setup', 'bot', time_bot_setup, bot_class, num_players, seeds[:100])
+        record(bot_name + '.get_move', 'call', time_get_moves, bot_class, num_players, seeds)
+        for players in range(2, 6):
+            record("{}.game_{}p".format(bot_name, players), 'game',
+                   time_games, bot_class, players, seeds)
+    record('HanabiCheatBot.batch', 'game', time_batch, HanabiCheatBot, num_players, seeds)
+    return results
+
+
+def compare(baseline, results, threshold=THRESHOLD):
+    """returns (name, old, new) for each benchmark more than threshold slower than baseline"""
+    return [(name, baseline[name]['us'], result['us'])
+            for name, result in sorted(results.items())
+            if name in baseline and result['us'] > baseline[name]['us'] * (1 + threshold)]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('num_players', type=int, nargs='?', default=2)
+    parser.add_argument('num_games', type=int, nargs='?', default=1000)
+    parser.add_argument('--save', metavar='FILE', help="write the timings to a baseline file")
+    parser.add_argument('--compare', metavar='FILE', help="flag regressions against a baseline")
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help="runs of each benchmark to take the quickest of")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="fractional slowdown counted as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args    = parse_args(sys.argv[1:] if argv is None else argv)
+    results = run_suite(args.num_players, args.num_games, args.repeat)
+
+    print("{} players, {} games".format(args.num_players, args.num_games))
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+    for name, result in sorted(results.items()):
+        change = ''
+        if name in baseline:
+            change = "{:+6.1%}".format(result['us'] / baseline[name]['us'] - 1)
+        print("{:30} {:10.2f} us/{:5} {}".format(name, result['us'], result['per'], change))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'num_players': args.num_players, 'num_games': args.num_games,
+                       'python': platform.python_version(), 'results': results},
+                      file, indent=1, sort_keys=True)
+    if args.compare:
+        regressions = compare(baseline, results, args.threshold)
+        for name, old, new in regressions:
+            print("REGRESSION {}: {:.2f} -> {:.2f} us".format(name, old, new))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
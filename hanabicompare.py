@@ -0,0 +1,179 @@
+"""Compares two bots on the same seeds, stopping once the difference in their scores is clear
+
+   Both bots play every seed of a run, so each pair of games shares its deal and the luck of
+   the deal largely cancels out of their difference in score. The mean difference is checked
+   after every chunk of pairs against a confidence interval whose level is split evenly over
+   all the checks the run could make, so stopping at the first one that's clear keeps the
+   chance of a false call within alpha however many checks it takes. A run stops when the
+   interval leaves out zero, when it's narrower than delta either side so the bots are level
+   to within delta, or when max_reps pairs have been played.
+
+   run as `python hanabicompare.py BasicBot CheatBot [--players N] [--seed SEED]`
+"""
+import os
+import sys
+import argparse
+from math import sqrt, erfc, ceil
+from itertools import islice
+from multiprocessing import Pool
+
+from hanabi import iter_seeds, make_seed, seed_rng
+from hanabirunner import play_game, CHUNK_SIZE
+from hanabibot import find_bot
+
+ALPHA    = 0.05   # chance of calling a difference between bots that are level
+DELTA    = 0.1    # difference in mean score small enough to call the bots level
+MAX_REPS = 20000  # pairs of games to give up after
+MIN_REPS = 200    # pairs of games before the first check
+
+
+def z_score(p):
+    """returns z with a chance p of a standard normal being above it"""
+    low, high = 0.0, 40.0
+    while high - low > 1e-9:
+        mid = (low + high) / 2
+        if erfc(mid / sqrt(2)) / 2 > p:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+class PairedTally():
+    """Running means of two bots' scores on the same seeds, and of the differences between them"""
+
+    def __init__(self):
+        self.games  = 0
+        self.mean_a = 0.0
+        self.mean_b = 0.0
+        self.mean   = 0.0  # of score_a - score_b
+        self.m2     = 0.0  # sum of squared differences from it
+        self.wins   = [0, 0]
+
+    def add(self, result_a, result_b):
+        diff         = result_a.score - result_b.score
+        self.games  += 1
+        self.mean_a += (result_a.score - self.mean_a) / self.games
+        self.mean_b += (result_b.score - self.mean_b) / self.games
+        delta        = diff - self.mean
+        self.mean   += delta / self.games
+        self.m2     += delta * (diff - self.mean)
+        if diff:
+            self.wins[diff < 0] += 1
+
+    def stderr(self):
+        return sqrt(self.m2 / (self.games - 1) / self.games) if self.games > 1 else float('inf')
+
+
+def decide(tally, z, delta):
+    """returns 'A', 'B' or 'level' once tally settles which bot is better, otherwise None"""
+    half_width = z * tally.stderr()
+    if tally.mean - half_width > 0:
+        return 'A'
+    if tally.mean + half_width < 0:
+        return 'B'
+    if half_width < delta:
+        return 'level'
+    return None
+
+
+def pair_jobs(bot_a, bot_b, num_players, seeds, stop_early, chunk_size=CHUNK_SIZE):
+    seeds = iter(seeds)
+    while True:
+        chunk = list(islice(seeds, chunk_size))
+        if not chunk:
+            return
+        yield bot_a, bot_b, num_players, chunk, stop_early
+
+
+def play_pairs(job):
+    """plays both bots of a (bot_a, bot_b, num_players, seeds, stop_early) job on each seed"""
+    bot_a, bot_b, num_players, seeds, stop_early = job
+    return [(play_game(bot_a, num_players, seed, stop_early),
+             play_game(bot_b, num_players, seed, stop_early)) for seed in seeds]
+
+
+def iter_pairs(bot_a, bot_b, num_players, seed=None, reps=MAX_REPS, workers=None,
+               stop_early=False, chunk_size=CHUNK_SIZE):
+    """ yields a chunk at a time of (GameResult of bot_a, GameResult of bot_b) for each seed of
+        a run, played over workers processes. Closing it early stops the workers.
+    """
+    seeds   = iter_seeds(seed if seed is not None else make_seed(seed_rng), reps)
+    jobs    = pair_jobs(bot_a, bot_b, num_players, seeds, stop_early, chunk_size)
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        yield from map(play_pairs, jobs)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(play_pairs, jobs)
+
+
+def compare_bots(bot_a, bot_b, num_players, seed=None, max_reps=MAX_REPS, alpha=ALPHA,
+                 delta=DELTA, min_reps=MIN_REPS, workers=None, stop_early=False,
+                 chunk_size=CHUNK_SIZE, on_check=None):
+    """ plays bot_a and bot_b on the same seeds until one is clearly better or they're level
+        to within delta, as described above, calling on_check(tally) at each check. Returns
+        the PairedTally and 'A', 'B', 'level' or None if max_reps pairs didn't settle it.
+    """
+    checks   = ceil(max_reps / chunk_size)
+    z        = z_score(alpha / 2 / checks)
+    tally    = PairedTally()
+    decision = None
+    pairs    = iter_pairs(bot_a, bot_b, num_players, seed, max_reps, workers, stop_early,
+                          chunk_size)
+    try:
+        for chunk in pairs:
+            for result_a, result_b in chunk:
+                tally.add(result_a, result_b)
+            if tally.games < min_reps:
+                continue
+            decision = decide(tally, z, delta)
+            if on_check:
+                on_check(tally)
+            if decision:
+                break
+    finally:
+        pairs.close()
+    return tally, decision
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('bot_a', type=find_bot, help="bot class, eg. BasicBot")
+    parser.add_argument('bot_b', type=find_bot)
+    parser.add_argument('--players', type=int, default=2, choices=range(2, 6))
+    parser.add_argument('--seed', help="first seed of the run, random if not given")
+    parser.add_argument('--max-reps', type=int, default=MAX_REPS,
+                        help="pairs of games to give up after")
+    parser.add_argument('--alpha', type=float, default=ALPHA,
+                        help="chance of calling a difference that isn't there")
+    parser.add_argument('--delta', type=float, default=DELTA,
+                        help="difference in mean score small enough to call the bots level")
+    parser.add_argument('--workers', type=int, help="processes to play on, default one per cpu")
+    parser.add_argument('--stop-early', action='store_true',
+                        help="end games once the score can't go up")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    name_a, name_b = args.bot_a.__name__, args.bot_b.__name__
+
+    def on_check(tally):
+        sys.stderr.write("\r{} pairs, difference {:+.3f} +/- {:.3f}".format(
+                         tally.games, tally.mean, tally.stderr()))
+
+    tally, decision = compare_bots(args.bot_a, args.bot_b, args.players, args.seed,
+                                   args.max_reps, args.alpha, args.delta, workers=args.workers,
+                                   stop_early=args.stop_early, on_check=on_check)
+    sys.stderr.write("\n")
+    print("{} pairs of {} player games".format(tally.games, args.players))
+    print("{:30} mean {:6.3f}, better in {} games".format(name_a, tally.mean_a, tally.wins[0]))
+    print("{:30} mean {:6.3f}, better in {} games".format(name_b, tally.mean_b, tally.wins[1]))
+    print("difference {:+.3f}, standard error {:.3f}".format(tally.mean, tally.stderr()))
+    if decision == 'level':
+        print("level to within {}".format(args.delta))
+    elif decision:
+        print("{} is better".format(name_a if decision == 'A' else name_b))
+    else:
+        print("no clear difference after {} pairs".format(tally.games))
+
+
+if __name__ == "__main__":
+    main()
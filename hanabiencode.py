@@ -0,0 +1,236 @@
+"""Fixed size numeric observations of Hanabi games, for bots that learn
+
+   An observation is what one seat can see, as a flat float32 vector whose sections, in
+   order, are:
+
+       hands      the kind of each card in the other players' hands, one-hot over the 25
+                  kinds per slot, for each player in turn after the seat, empty slots zero
+       knowledge  the kinds each card could be, from its hand mask, for the seat's own hand
+                  and then each player after it, as every player knows what's been hinted
+       table      the kinds that have been played
+       discards   the copies of each kind discarded, as a fraction of its copies
+       clocks     clocks left, as a fraction of the most there can be
+       lives      lives left, of the 2 a game starts with
+       deck       cards left to draw, as a fraction of the 50
+
+   Seats other than the observer's are always numbered from it, so a policy sees the same
+   layout whichever seat it plays. ObservationEncoder writes the observations and legal move
+   masks of a whole BatchHanabiGame into arrays it keeps and overwrites on each call, and
+   encode_game() writes the same observation for a HanabiGame. BatchHanabiEnv keeps a batch
+   of games going for training, dealing a game the next seed of a run as soon as it's over.
+
+   run as `python hanabiencode.py [--players N] [--games N] [--steps N]` to time the
+   environment stepping random legal moves
+"""
+import sys
+import argparse
+from time import perf_counter
+
+import numpy as np
+
+from hanabi import CARDS, CARD_KIND, SCARCITY, HAND_SIZE, HanabiGame, num_moves, next_seed, \
+    make_seed, seed_rng
+from hanabibatch import BatchHanabiGame
+from hanabibot import HanabiRandomBot
+
+KINDS          = np.arange(25)
+KIND_OF_CARD   = np.array(CARD_KIND + [-1], dtype=np.int8)  # -1 for an empty slot
+KIND_COLOURS   = KINDS // 5
+KIND_NUMBERS   = KINDS % 5  # less one, so a kind is played once its colour's height passes it
+KIND_COPIES    = np.array([SCARCITY[n + 1] for n in KIND_NUMBERS], dtype=np.float32)
+MAX_CLOCKS     = np.float32(HanabiGame.max_clocks)
+START_LIVES    = np.float32(2)
+DECK_CARDS     = np.float32(len(CARDS))
+
+
+def sections(num_players):
+    """returns (name, shape) of each section of a num_players observation, in order"""
+    return [('hands',     (num_players - 1, HAND_SIZE, 25)),
+            ('knowledge', (num_players, HAND_SIZE, 25)),
+            ('table',     (25,)),
+            ('discards',  (25,)),
+            ('clocks',    (1,)),
+            ('lives',     (1,)),
+            ('deck',      (1,))]
+
+
+def layout(num_players):
+    """returns a dict of (slice, shape) by section name, and the size of an observation"""
+    slices, start = {}, 0
+    for name, shape in sections(num_players):
+        size          = int(np.prod(shape))
+        slices[name]  = slice(start, start + size), shape
+        start        += size
+    return slices, start
+
+
+class ObservationEncoder():
+    """ Encodes observations of num_games games of num_players into observations, an array
+        with a row per game, and their legal moves into legal, with a column per move code.
+        Both are overwritten by each encode(), so copy anything that needs keeping.
+    """
+
+    def __init__(self, num_players, num_games):
+        self.num_players  = num_players
+        self.slices, size = layout(num_players)
+        self.size         = size
+        self.observations = np.zeros((num_games, size), np.float32)
+        self.legal        = np.zeros((num_games, num_moves(num_players)), bool)
+        self.views        = {name: self.observations[:, where].reshape((num_games,) + shape)
+                             for name, (where, shape) in self.slices.items()}
+
+        # scratch arrays, so encoding allocates nothing bigger than a few index temporaries
+        shape             = (num_games, num_players, HAND_SIZE)
+        self.offsets      = np.arange(num_players)
+        self.first_slots  = (np.arange(num_games) * num_players * HAND_SIZE)[:, None, None] + \
+            np.arange(HAND_SIZE)
+        self.seats        = np.zeros((num_games, num_players), np.intp)
+        self.index        = np.zeros(shape, np.intp)
+        self.cards        = np.zeros(shape, np.int8)
+        self.kinds        = np.zeros(shape, np.int8)
+        self.masks        = np.zeros(shape, np.int32)
+        self.one_hot      = np.zeros((num_games, num_players - 1, HAND_SIZE, 25), bool)
+        self.bits         = np.zeros(shape + (25,), np.int32)
+        self.kind_heights = np.zeros((num_games, 25), np.int8)
+        self.played       = np.zeros((num_games, 25), bool)
+
+    def encode(self, batch, seats=None):
+        """ writes each game of batch as seen from its seat in seats, by default the current
+            player's, and the current player's legal moves. Returns (observations, legal).
+        """
+        views = self.views
+        np.add((batch.turn if seats is None else seats)[:, None], self.offsets, out=self.seats)
+        np.remainder(self.seats, self.num_players, out=self.seats)
+        np.multiply(self.seats[:, :, None], HAND_SIZE, out=self.index)
+        np.add(self.index, self.first_slots, out=self.index)
+
+        np.take(batch.hands, self.index, out=self.cards)
+        np.take(KIND_OF_CARD, self.cards, out=self.kinds)
+        np.equal(self.kinds[:, 1:, :, None], KINDS, out=self.one_hot)
+        np.copyto(views['hands'], self.one_hot)
+
+        np.take(batch.knowledge, self.index, out=self.masks)
+        np.right_shift(self.masks[..., None], KINDS, out=self.bits)
+        np.bitwise_and(self.bits, 1, out=self.bits)
+        np.copyto(views['knowledge'], self.bits, casting='unsafe')
+
+        np.take(batch.heights, KIND_COLOURS, axis=1, out=self.kind_heights)
+        np.greater(self.kind_heights, KIND_NUMBERS, out=self.played)
+        np.copyto(views['table'], self.played)
+        np.divide(batch.discards, KIND_COPIES, out=views['discards'])
+        np.divide(batch.clocks, MAX_CLOCKS, out=views['clocks'][:, 0])
+        np.divide(batch.lives, START_LIVES, out=views['lives'][:, 0])
+        np.divide(batch.deck_size, DECK_CARDS, out=views['deck'][:, 0])
+
+        batch.legal_moves_mask(out=self.legal)
+        return self.observations, self.legal
+
+
+def encode_game(hanabi, player_id=None, out=None):
+    """ writes hanabi as seen from player_id, by default the current player, into out, a float32
+        array of an observation's size, made if not given, and returns it
+    """
+    slices, size = layout(hanabi.num_players)
+    player_id    = hanabi.current_player_id() if player_id is None else player_id
+    out          = np.zeros(size, np.float32) if out is None else out
+    out[:]       = 0
+    views        = {name: out[where].reshape(shape) for name, (where, shape) in slices.items()}
+    seats        = [(player_id + offset) % hanabi.num_players
+                    for offset in range(hanabi.num_players)]
+    for offset, seat in enumerate(seats):
+        for slot, (card, mask) in enumerate(zip(hanabi.hand_ids[seat], hanabi.hand_masks[seat])):
+            if offset:
+                views['hands'][offset - 1, slot, CARD_KIND[card]] = 1
+            views['knowledge'][offset, slot] = [mask >> kind & 1 for kind in range(25)]
+    views['table'][:]    = [hanabi.heights[kind // 5] > kind % 5 for kind in range(25)]
+    views['discards'][:] = [count / SCARCITY[kind % 5 + 1]
+                            for kind, count in enumerate(hanabi.discard_counts)]
+    views['clocks'][0]   = hanabi.clocks / hanabi.max_clocks
+    views['lives'][0]    = hanabi.lives / 2
+    views['deck'][0]     = len(hanabi.deck_ids) / len(CARDS)
+    return out
+
+
+def legal_moves_mask(hanabi):
+    """returns a bool array with True for each move code hanabi's current player can make"""
+    mask = np.zeros(num_moves(hanabi.num_players), bool)
+    if not hanabi.is_game_over():
+        mask[hanabi.legal_moves()] = True
+    return mask
+
+
+class BatchHanabiEnv():
+    """ Keeps num_games games of num_players going in a BatchHanabiGame for training, dealing
+        each the next seed of a run from seed once it's over, so every row always holds a game
+        in play. Observations are from the current player's seat, and a row's reward is the
+        points its move scored.
+    """
+
+    def __init__(self, num_players, num_games, seed=None, stop_early=False):
+        self.next_seed    = seed if seed is not None else make_seed(seed_rng)
+        self.batch        = BatchHanabiGame(num_players, self.take_seeds(num_games),
+                                            stop_early=stop_early)
+        self.encoder      = ObservationEncoder(num_players, num_games)
+        self.scores       = np.zeros(num_games, np.int8)
+        self.rewards      = np.zeros(num_games, np.float32)
+        self.dones        = np.zeros(num_games, bool)
+        self.final_scores = np.zeros(num_games, np.int8)  # of the games last finished in a row
+        self.finished     = 0
+
+    def take_seeds(self, count):
+        seeds = []
+        for _ in range(count):
+            seeds.append(self.next_seed)
+            self.next_seed = next_seed(self.next_seed)
+        return seeds
+
+    def observe(self):
+        """returns (observations, legal) for the current player of each game"""
+        return self.encoder.encode(self.batch)
+
+    def reset(self):
+        """deals every row a new game and returns observe()"""
+        self.batch.deal(self.batch.games, self.take_seeds(len(self.batch.games)))
+        self.scores[:] = 0
+        return self.observe()
+
+    def step(self, moves):
+        """ makes a move per game and returns (observations, legal, rewards, dones), where
+            dones marks the games that move finished, whose rows already hold new games and
+            whose final scores are in final_scores. The arrays are overwritten by the next step.
+        """
+        batch = self.batch
+        batch.apply(moves)
+        scores = batch.scores()
+        np.subtract(scores, self.scores, out=self.rewards)
+        np.copyto(self.dones, batch.done)
+        finished = np.flatnonzero(self.dones)
+        if len(finished):
+            self.final_scores[finished] = scores[finished]
+            self.finished              += len(finished)
+            batch.deal(finished, self.take_seeds(len(finished)))
+            scores[finished] = 0
+        self.scores = scores
+        return self.observe() + (self.rewards, self.dones)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="times BatchHanabiEnv on random moves")
+    parser.add_argument('--players', type=int, default=2, choices=range(2, 6))
+    parser.add_argument('--games', type=int, default=1024, help="games stepped together")
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', help="first seed of the run, random if not given")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    env   = BatchHanabiEnv(args.players, args.games, args.seed)
+    env.reset()
+    start = perf_counter()
+    for _ in range(args.steps):
+        env.step(HanabiRandomBot.get_batch_moves(env.batch))
+    seconds = perf_counter() - start
+    moves   = args.steps * args.games
+    print("{} moves in {:.2f}s, {:,.0f} a second, {:.2f}M an hour, {} games finished".format(
+          moves, seconds, moves / seconds, moves / seconds * 3600 / 1e6, env.finished))
+
+
+if __name__ == "__main__":
+    main()
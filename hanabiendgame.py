@@ -0,0 +1,68 @@
+"""How many points bots leave behind in the last round of their games
+
+   play_to_endgame() plays a seed with a bot in each seat, and when the deck runs out has
+   hanabisolver find the best score that could still be reached with every card seen, as the
+   bound on what the bots' last round could have scored.
+
+   run as `python hanabiendgame.py BasicBot [--players N] [--seed SEED] [--reps N]` to see
+   how many points bots leave behind in their last round
+"""
+import sys
+import argparse
+from collections import namedtuple
+from multiprocessing import Pool
+from time import perf_counter
+
+from hanabi import HanabiGame, iter_seeds, make_seed, seed_rng
+from hanabibot import find_bot
+from hanabisolver import solve
+
+EndgameResult = namedtuple('EndgameResult', ['seed', 'score', 'lives', 'best', 'seconds'])
+
+
+def play_to_endgame(bot_class, num_players, seed):
+    """ plays seed with a bot_class in each seat, returning its EndgameResult, with the best
+        score solve() finds from where the deck ran out, or the bots' own if it never did
+    """
+    start  = perf_counter()
+    hanabi = HanabiGame(num_players, seed)
+    bots   = [bot_class(hanabi, player_id=p) for p in range(num_players)]
+    best   = None
+    while not hanabi.is_game_over():
+        if best is None and hanabi.final_turn is not None:
+            best = solve(hanabi).score
+        move = bots[hanabi.current_player_id()].get_move()
+        hanabi.apply(hanabi.move_code(move) if isinstance(move, str) else move)
+    score = hanabi.score()
+    return EndgameResult(seed, score, hanabi.lives, score if best is None else best,
+                         perf_counter() - start)
+
+
+def play_endgames(job):
+    bot_class, num_players, seeds = job
+    return [play_to_endgame(bot_class, num_players, seed) for seed in seeds]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="shows the points bots lose in the endgame")
+    parser.add_argument('bot', type=find_bot, help="bot class, eg. BasicBot")
+    parser.add_argument('--players', type=int, default=2, choices=range(2, 6))
+    parser.add_argument('--seed', help="first seed of the run, random if not given")
+    parser.add_argument('--reps', type=int, default=100)
+    parser.add_argument('--workers', type=int, help="processes to play on, default one per cpu")
+    args  = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    seeds = list(iter_seeds(args.seed or make_seed(seed_rng), args.reps))
+    jobs  = [(args.bot, args.players, seeds[i:i + 10]) for i in range(0, len(seeds), 10)]
+    with Pool(args.workers) as pool:
+        results = [result for chunk in pool.imap(play_endgames, jobs) for result in chunk]
+    lost = [result for result in results if result.best > result.score]
+    print("{} x {} for {} reps".format(args.players, args.bot.__name__, len(results)))
+    print("mean score {:.2f}, with a perfect last round {:.2f}".format(
+          sum(r.score for r in results) / len(results),
+          sum(r.best for r in results) / len(results)))
+    print("{} games lost points in the last round, eg. {}".format(
+          len(lost), " ".join(r.seed for r in lost[:5])))
+
+
+if __name__ == "__main__":
+    main()
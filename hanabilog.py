@@ -0,0 +1,212 @@
+"""Append-only log of finished bot games, with an index for finding them by outcome
+
+   Each game is a record in PATH, a binary file of:
+
+       H  bytes in the rest of the record
+       B  length of the seed, then the seed
+       B  length of the bot's name, then the name
+       B  number of players
+       B  score
+       b  lives left, -1 if they ran out
+       H  number of moves, then a byte per move code (see hanabi.py)
+
+   all little endian and back to back, after a short header. PATH.idx has a fixed size entry
+   per record, its offset in PATH, score, lives and bot number, where PATH.bots lists the bot
+   names in number order. Both files can be memory mapped, and records are found by scanning
+   the small index and reading only the records that match. The index can be rebuilt from
+   the log with reindex().
+
+   run as `python hanabilog.py PATH [--score N] [--lives N] [--bot NAME]` to list the games
+   that match
+"""
+import os
+import sys
+import mmap
+import struct
+import argparse
+from collections import namedtuple
+
+from hanabi import HanabiGame
+
+MAGIC       = b'HNBT\x01'
+LENGTH      = struct.Struct('<H')
+OUTCOME     = struct.Struct('<BBbH')  # num_players, score, lives, number of moves
+INDEX_ENTRY = struct.Struct('<QBbH')  # offset, score, lives, bot number
+
+GameRecord = namedtuple('GameRecord', ['seed', 'bot', 'num_players', 'score', 'lives', 'moves'])
+
+
+def replay(record):
+    """ returns the HanabiGame a GameRecord's moves leave, to look at or check its outcome,
+        raising ValueError at the first move that isn't legal
+    """
+    hanabi = HanabiGame(record.num_players, record.seed)
+    for move in record.moves:
+        if hanabi.is_game_over() or move not in hanabi.legal_moves():
+            raise ValueError("illegal move {} at turn {}".format(move, hanabi.turn))
+        hanabi.apply(move)
+    return hanabi
+
+
+def pack_record(record):
+    seed, bot = record.seed.encode(), record.bot.encode()
+    body = b''.join([bytes([len(seed)]), seed, bytes([len(bot)]), bot,
+                     OUTCOME.pack(record.num_players, record.score, record.lives,
+                                  len(record.moves)),
+                     bytes(record.moves)])
+    return LENGTH.pack(len(body)) + body
+
+
+def unpack_record(buffer, offset):
+    """returns the GameRecord at offset in buffer and the offset of the one after it"""
+    length,  = LENGTH.unpack_from(buffer, offset)
+    end      = offset + LENGTH.size + length
+    pos      = offset + LENGTH.size
+    seed     = bytes(buffer[pos + 1:pos + 1 + buffer[pos]]).decode()
+    pos     += 1 + buffer[pos]
+    bot      = bytes(buffer[pos + 1:pos + 1 + buffer[pos]]).decode()
+    pos     += 1 + buffer[pos]
+    num_players, score, lives, num_moves = OUTCOME.unpack_from(buffer, pos)
+    pos     += OUTCOME.size
+    moves    = list(buffer[pos:pos + num_moves])
+    return GameRecord(seed, bot, num_players, score, lives, moves), end
+
+
+class GameLog():
+    """ Appends GameRecords to a log at path, and finds them again through its index
+
+        usable as a context manager, which closes the files on the way out
+    """
+
+    def __init__(self, path):
+        self.path      = path
+        self.bots      = []
+        self.log_file  = None
+        self.idx_file  = None
+        self._mmap     = None
+        if os.path.exists(path + '.bots'):
+            with open(path + '.bots') as file:
+                self.bots = file.read().splitlines()
+        if not os.path.exists(path):
+            with open(path, 'wb') as file:
+                file.write(MAGIC)
+            for suffix in ('.idx', '.bots'):
+                open(path + suffix, 'wb').close()
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} isn't a game log".format(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for file in (self._mmap, self.log_file, self.idx_file):
+            if file is not None:
+                file.close()
+        self._mmap, self.log_file, self.idx_file = None, None, None
+
+    def bot_number(self, bot):
+        if bot not in self.bots:
+            self.bots.append(bot)
+            with open(self.path + '.bots', 'a') as file:
+                file.write(bot + "\n")
+        return self.bots.index(bot)
+
+    def append(self, record):
+        """adds a GameRecord to the end of the log and its index"""
+        if self.log_file is None:
+            self.log_file = open(self.path, 'ab')
+            self.idx_file = open(self.path + '.idx', 'ab')
+        offset = self.log_file.tell()
+        self.log_file.write(pack_record(record))
+        self.idx_file.write(INDEX_ENTRY.pack(offset, record.score, record.lives,
+                                             self.bot_number(record.bot)))
+
+    def flush(self):
+        if self.log_file is not None:
+            self.log_file.flush()
+            self.idx_file.flush()
+
+    def buffer(self):
+        """returns the log memory mapped, remapped if it's grown since last time"""
+        self.flush()
+        size = os.path.getsize(self.path)
+        if self._mmap is None or len(self._mmap) != size:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.path, 'rb') as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def entries(self):
+        """yields (offset, score, lives, bot name) for every game in the index"""
+        self.flush()
+        if not os.path.getsize(self.path + '.idx'):
+            return
+        with open(self.path + '.idx', 'rb') as file:
+            index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for offset, score, lives, bot in INDEX_ENTRY.iter_unpack(index):
+                yield offset, score, lives, self.bots[bot]
+        finally:
+            index.close()
+
+    def find(self, score=None, lives=None, bot=None):
+        """yields the GameRecords whose score, lives and bot match those given"""
+        buffer = self.buffer()
+        for offset, entry_score, entry_lives, entry_bot in self.entries():
+            if (score is None or score == entry_score) and \
+               (lives is None or lives == entry_lives) and \
+               (bot is None or bot == entry_bot):
+                yield unpack_record(buffer, offset)[0]
+
+    def __iter__(self):
+        """yields every GameRecord in the log, in the order they were added"""
+        buffer = self.buffer()
+        offset = len(MAGIC)
+        while offset < len(buffer):
+            record, offset = unpack_record(buffer, offset)
+            yield record
+
+    def __len__(self):
+        self.flush()
+        return os.path.getsize(self.path + '.idx') // INDEX_ENTRY.size
+
+    def reindex(self):
+        """rebuilds the index and bot list from the log, eg. if they've been lost"""
+        self.close()
+        self.bots = []
+        for suffix in ('.idx', '.bots'):
+            open(self.path + suffix, 'wb').close()
+        buffer = self.buffer()
+        offset = len(MAGIC)
+        with open(self.path + '.idx', 'wb') as idx_file:
+            while offset < len(buffer):
+                record, end = unpack_record(buffer, offset)
+                idx_file.write(INDEX_ENTRY.pack(offset, record.score, record.lives,
+                                                self.bot_number(record.bot)))
+                offset = end
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="lists the games in a game log that match")
+    parser.add_argument('path')
+    parser.add_argument('--score', type=int)
+    parser.add_argument('--lives', type=int)
+    parser.add_argument('--bot')
+    parser.add_argument('--reindex', action='store_true', help="rebuild the index first")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    with GameLog(args.path) as log:
+        if args.reindex:
+            log.reindex()
+        for record in log.find(args.score, args.lives, args.bot):
+            print("{} {} x{} score {} lives {} moves {}".format(
+                  record.seed, record.bot, record.num_players, record.score, record.lives,
+                  " ".join(map(str, record.moves))))
+
+
+if __name__ == "__main__":
+    main()
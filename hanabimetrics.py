@@ -0,0 +1,129 @@
+"""Opt-in call counts and timings for the engine's and bots' hot methods
+
+   Nothing is measured until instrumented() swaps timing wrappers in for the target methods,
+   and it puts the originals back afterwards, so code that isn't being measured runs exactly
+   as it would without this module. eg.
+
+       with instrumented() as metrics:
+           play_game(HanabiBasicBot, 2, 'aaaaa')
+       print(metrics.summary())
+
+   Times are inclusive, so a method's figure covers the targets it calls too.
+"""
+from time import perf_counter
+from functools import wraps
+from contextlib import contextmanager
+
+import hanabi
+import hanabibot
+
+TARGETS = [
+    (hanabi.HanabiGame, 'play'),
+    (hanabi.HanabiGame, 'discard'),
+    (hanabi.HanabiGame, 'inform_mask'),
+    (hanabi.HanabiGame, 'replenish_hand'),
+    (hanabi.HanabiGame, 'score'),
+    (hanabibot.HanabiBotBase, '__init__'),
+    (hanabibot.HanabiBotBase, 'find_my_playable_cards'),
+    (hanabibot.HanabiBotBase, 'equivalent'),
+    (hanabibot.HanabiBotBase, 'count_in_play'),
+    (hanabibot.HanabiBotBase, 'is_junk'),
+    (hanabibot.HanabiBasicBot, 'get_move'),
+    (hanabibot.HanabiBasicBot, 'will_play_idx'),
+    (hanabibot.HanabiBasicBot, 'could_play_idx'),
+    (hanabibot.HanabiBasicBot, 'will_discard_idx'),
+]
+
+
+class CallStats():
+    """Count and total time of a method's calls, with a histogram of their durations"""
+    __slots__ = ('count', 'total', 'buckets')
+
+    def __init__(self):
+        self.count   = 0
+        self.total   = 0.0
+        self.buckets = [0] * 40  # calls taking under 2**i nanoseconds, and at least half that
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[min(int(seconds * 1e9).bit_length(), 39)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def quantile(self, q):
+        """returns an upper bound in seconds on the time q of the calls were quicker than"""
+        rank = q * self.count
+        for i, count in enumerate(self.buckets):
+            rank -= count
+            if rank <= 0:
+                return 2 ** i / 1e9
+        return 2 ** len(self.buckets) / 1e9
+
+
+class Metrics():
+    """CallStats keyed by 'Class.method', which can be merged from other processes"""
+
+    def __init__(self):
+        self.stats = {}
+
+    def __getitem__(self, name):
+        if name not in self.stats:
+            self.stats[name] = CallStats()
+        return self.stats[name]
+
+    def __bool__(self):
+        return bool(self.stats)
+
+    def merge(self, other):
+        for name, stats in other.stats.items():
+            self[name].merge(stats)
+
+    def summary(self, per=None, per_name='move'):
+        """ returns a table of the stats, busiest first, with time per call and, given a count
+            of per_name things such as moves, the time each one spent in the method
+        """
+        header = "{:38} {:>10} {:>10} {:>9} {:>9} {:>9}".format(
+                 'method', 'calls', 'total ms', 'mean us', 'p50 us', 'p99 us')
+        op     = [header + (" {:>9}".format("us/" + per_name) if per else '')]
+        for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total):
+            if not stats.count:
+                continue
+            line = "{:38} {:10d} {:10.1f} {:9.2f} {:9.2f} {:9.2f}".format(
+                   name, stats.count, 1e3 * stats.total, 1e6 * stats.total / stats.count,
+                   1e6 * stats.quantile(0.5), 1e6 * stats.quantile(0.99))
+            if per:
+                line += " {:9.2f}".format(1e6 * stats.total / per)
+            op.append(line)
+        return "\n".join(op)
+
+
+def timed(func, stats):
+    """returns func wrapped to add the time each call takes to stats"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.add(perf_counter() - start)
+    return wrapper
+
+
+@contextmanager
+def instrumented(metrics=None, targets=TARGETS):
+    """ times calls to each (class, method name) in targets while the context is open,
+        adding them to metrics, or a new Metrics, which it yields
+    """
+    metrics   = metrics if metrics is not None else Metrics()
+    originals = [(cls, name, cls.__dict__[name]) for cls, name in targets]
+    for cls, name, method in originals:
+        setattr(cls, name, timed(method, metrics["{}.{}".format(cls.__name__, name)]))
+    try:
+        yield metrics
+    finally:
+        for cls, name, method in originals:
+            setattr(cls, name, method)
@@ -0,0 +1,288 @@
+"""A persistent index of how well a seed can be played, to benchmark bots against
+
+   Each seed of a corpus is played once by HanabiCheatBot, which sees its own cards, with the
+   last round then solved exactly by hanabiendgame. Its oracle score, and a few features of
+   how the deck is ordered, are stored in PATH as fixed size records after a header naming
+   the number of players and the corpus, which a build must carry on with:
+
+       8s  seed, padded with nulls
+       B   HanabiCheatBot's score
+       b   lives it had left, -1 if they ran out
+       B   best score from where the deck ran out, the oracle score
+       B   1s dealt in the opening hands
+       B   5s among the last ten cards drawn
+       B   card kinds whose first copy is among the last ten cards drawn
+       B   cards drawn until every kind has turned up
+
+   Records are written a chunk at a time in corpus order as worker processes finish them, so
+   building the index can be stopped at any point and carries on from where it got to. Seeds
+   can then be drawn stratified by oracle score, or the oracle scores of the seeds a bot
+   played used as a control variate for its mean.
+
+   run as `python hanabioracle.py PATH --players 2 --seed aaaaa --reps 1000000` to build or
+   carry on building an index, adding `--sample N` to print a stratified sample of its seeds
+   for `run_hanabi.py --seed-file`
+"""
+import os
+import sys
+import mmap
+import random
+import struct
+import hashlib
+import argparse
+from collections import namedtuple, defaultdict
+from itertools import islice
+from multiprocessing import Pool
+
+from hanabi import HAND_SIZE, CARD_KIND, CARD_NUMBER, shuffled_deal, iter_seeds
+from hanabibot import HanabiCheatBot
+from hanabiendgame import play_to_endgame
+
+MAGIC      = b'HNBO\x02'
+HEADER     = struct.Struct('<B24s')  # num_players, corpus
+RECORD     = struct.Struct('<8sBbBBBBB')
+CHUNK_SIZE = 100  # seeds handed to a worker at a time
+LATE       = 10   # cards at the bottom of the deck counted as late
+
+OracleRecord = namedtuple('OracleRecord', ['seed', 'score', 'lives', 'oracle', 'ones_dealt',
+                                           'fives_late', 'kinds_late', 'all_seen'])
+
+
+def deck_features(seed, num_players):
+    """returns (ones_dealt, fives_late, kinds_late, all_seen) for seed's deck"""
+    drawn  = shuffled_deal(seed)[0][::-1]
+    kinds  = [CARD_KIND[card] for card in drawn]
+    dealt  = HAND_SIZE * num_players
+    first  = {}
+    for i, kind in enumerate(kinds):
+        first.setdefault(kind, i)
+    late   = len(drawn) - LATE
+    return (sum(CARD_NUMBER[card] == 1 for card in drawn[:dealt]),
+            sum(CARD_NUMBER[card] == 5 for card in drawn[late:]),
+            sum(i >= late for i in first.values()),
+            max(first.values()) + 1)
+
+
+def oracle_record(seed, num_players):
+    """returns the OracleRecord of a seed"""
+    if len(seed.encode()) > 8:
+        raise ValueError("seeds can be at most 8 bytes, not {!r}".format(seed))
+    result = play_to_endgame(HanabiCheatBot, num_players, seed)
+    return OracleRecord(seed, result.score, result.lives, result.best,
+                        *deck_features(seed, num_players))
+
+
+def oracle_chunk(job):
+    """returns the packed records of a (num_players, seeds) job"""
+    num_players, seeds = job
+    return b''.join(RECORD.pack(seed.encode(), *oracle_record(seed, num_players)[1:])
+                    for seed in seeds)
+
+
+def unpack_record(seed, *fields):
+    return OracleRecord(seed.rstrip(b'\0').decode(), *fields)
+
+
+def oracle_jobs(num_players, seeds, chunk_size=CHUNK_SIZE):
+    seeds = iter(seeds)
+    while True:
+        chunk = list(islice(seeds, chunk_size))
+        if not chunk:
+            return
+        yield num_players, chunk
+
+
+def play_oracle_jobs(jobs, workers):
+    if workers == 1:
+        yield from map(oracle_chunk, jobs)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(oracle_chunk, jobs)
+
+
+def corpus_id(seed=None, seeds=None):
+    """ returns how an index names its corpus, a run from seed, which can be carried on with
+        more reps, or a list of seeds, which is named by a hash of them
+    """
+    if seeds is None:
+        return "run:{}".format(seed)
+    return "list:{}".format(hashlib.sha1("\n".join(seeds).encode()).hexdigest()[:16])
+
+
+class OracleIndex():
+    """ The OracleRecords of a corpus of seeds for num_players games, kept at path
+
+        usable as a context manager, which closes the file on the way out. A record only
+        partly written when a build was stopped is dropped on opening. corpus, a corpus_id(),
+        is kept in the header of a new index and must match it when opening an old one.
+    """
+
+    def __init__(self, path, num_players=None, corpus=None):
+        self.path  = path
+        self.file  = None
+        self.start = len(MAGIC) + HEADER.size
+        if not os.path.exists(path):
+            if num_players is None:
+                raise ValueError("{} doesn't exist, give num_players to make it".format(path))
+            with open(path, 'wb') as file:
+                file.write(MAGIC + HEADER.pack(num_players, (corpus or '').encode()))
+        with open(path, 'rb') as file:
+            header = file.read(self.start)
+        if header[:len(MAGIC)] != MAGIC or len(header) < self.start:
+            raise ValueError("{} isn't an oracle index".format(path))
+        self.num_players, stored = HEADER.unpack(header[len(MAGIC):])
+        self.corpus = stored.rstrip(b'\0').decode()
+        if num_players is not None and num_players != self.num_players:
+            raise ValueError("{} is for {} player games".format(path, self.num_players))
+        if corpus is not None and corpus != self.corpus:
+            raise ValueError("{} indexes the corpus {!r}, not {!r}".format(path, self.corpus,
+                                                                             corpus))
+        whole = self.start + len(self) * RECORD.size
+        if os.path.getsize(path) > whole:
+            with open(path, 'r+b') as file:
+                file.truncate(whole)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __len__(self):
+        if self.file is not None:
+            self.file.flush()
+        return (os.path.getsize(self.path) - self.start) // RECORD.size
+
+    def write(self, packed):
+        """appends packed records and flushes them, so a stopped build keeps them"""
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        self.file.write(packed)
+        self.file.flush()
+
+    def build(self, seeds, workers=None, chunk_size=CHUNK_SIZE, on_chunk=None):
+        """ adds the records of seeds, an iterable of the corpus from its start, after as many
+            of them as the index already has, calling on_chunk(len(self)) after each chunk.
+            Raises ValueError if seeds doesn't start with the seeds already indexed.
+        """
+        seeds = iter(seeds)
+        for record, seed in zip(self, seeds):  # stops before taking a seed past the index
+            if seed != record.seed:
+                raise ValueError("{} was built from a different corpus".format(self.path))
+        jobs  = oracle_jobs(self.num_players, seeds, chunk_size)
+        for packed in play_oracle_jobs(jobs, workers or os.cpu_count()):
+            self.write(packed)
+            if on_chunk:
+                on_chunk(len(self))
+
+    def __iter__(self):
+        """yields every OracleRecord in the index, in corpus order"""
+        if not len(self):
+            return
+        with open(self.path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            end = self.start + len(self) * RECORD.size
+            for fields in RECORD.iter_unpack(buffer[self.start:end]):
+                yield unpack_record(*fields)
+        finally:
+            buffer.close()
+
+    def records(self):
+        """returns a dict of every OracleRecord by seed"""
+        return {record.seed: record for record in self}
+
+    def strata(self, field='oracle'):
+        """returns the seeds of the index grouped by the value of a field of their records"""
+        strata = defaultdict(list)
+        for record in self:
+            strata[getattr(record, field)].append(record.seed)
+        return dict(strata)
+
+    def stratified_sample(self, n, rng=None, field='oracle'):
+        """ returns about n seeds drawn at random within each stratum of field, each stratum
+            getting its share of n in proportion to its size, and at least one seed
+        """
+        rng    = rng or random.Random()
+        strata = self.strata(field)
+        total  = sum(len(seeds) for seeds in strata.values())
+        sample = []
+        for value in sorted(strata):
+            seeds = strata[value]
+            share = max(1, round(n * len(seeds) / total))
+            sample.extend(rng.sample(seeds, min(share, len(seeds))))
+        return sample
+
+
+def adjusted_mean(scores, oracles, population_mean):
+    """ returns the mean of a bot's scores with the oracle scores of the same seeds used as a
+        control variate: the part of the bot's luck explained by how well its seeds could be
+        played, against population_mean, the oracle mean of the whole index, is taken away
+    """
+    n      = len(scores)
+    mean_s = sum(scores) / n
+    mean_o = sum(oracles) / n
+    var_o  = sum((o - mean_o) ** 2 for o in oracles)
+    if not var_o:
+        return mean_s
+    beta   = sum((s - mean_s) * (o - mean_o) for s, o in zip(scores, oracles)) / var_o
+    return mean_s - beta * (mean_o - population_mean)
+
+
+def summary(index):
+    """returns a table of how many seeds of index have each oracle score"""
+    records = list(index)
+    op      = ["{} seeds of {} player games".format(len(records), index.num_players)]
+    if records:
+        op.append("mean oracle score {:.2f}, HanabiCheatBot {:.2f}".format(
+                  sum(r.oracle for r in records) / len(records),
+                  sum(r.score for r in records) / len(records)))
+    for value, seeds in sorted(index.strata().items()):
+        op.append("  {:3d} {:7d} {:6.1%}".format(value, len(seeds), len(seeds) / len(records)))
+    return "\n".join(op)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="index file, made if it doesn't exist")
+    parser.add_argument('--players', type=int, choices=range(2, 6),
+                        help="players per game, needed to make a new index")
+    seeds = parser.add_mutually_exclusive_group()
+    seeds.add_argument('--seed', help="first seed of the corpus")
+    seeds.add_argument('--seed-file', type=argparse.FileType('r'),
+                       help="file of the corpus seeds, one per line, instead of a run")
+    parser.add_argument('--reps', type=int, default=0, help="seeds the corpus should have")
+    parser.add_argument('--workers', type=int, help="processes to play on, default one per cpu")
+    parser.add_argument('--sample', type=int, metavar='N',
+                        help="print a sample of N seeds stratified by oracle score")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    corpus, name = None, None
+    if args.seed_file:
+        corpus = [line.strip() for line in args.seed_file if line.strip()]
+        name   = corpus_id(seeds=corpus)
+    elif args.seed:
+        corpus = iter_seeds(args.seed, args.reps) if args.reps else None
+        name   = corpus_id(args.seed)
+    try:
+        index = OracleIndex(args.path, args.players, name)
+    except ValueError as e:
+        sys.exit(e)
+    with index:
+        if corpus is not None:
+            index.build(corpus, args.workers, on_chunk=lambda done: sys.stderr.write(
+                        "\r{} seeds indexed".format(done)))
+            sys.stderr.write("\n")
+        if args.sample:
+            print("\n".join(index.stratified_sample(args.sample)))
+        else:
+            print(summary(index))
+
+
+if __name__ == "__main__":
+    main()
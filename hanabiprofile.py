@@ -0,0 +1,119 @@
+"""Profiling for bot runs, giving pstats and flamegraph-ready collapsed stacks
+
+   Each chunk of games is played under cProfile, for exact call counts and times, while a
+   SIGPROF timer samples the stack every millisecond of cpu, for the collapsed stacks that
+   flamegraph.pl and speedscope read. Chunks played in worker processes send both back to be
+   merged into the run's RunProfile, which writes them out as PREFIX.pstats and
+   PREFIX.collapsed. Stacks aren't sampled where there's no setitimer, such as on Windows.
+"""
+import os
+import signal
+import cProfile
+import pstats
+from io import StringIO
+from collections import Counter
+from contextlib import contextmanager
+
+SAMPLE_INTERVAL = 0.001  # seconds of cpu time between stack samples
+
+
+class StatsData():
+    """Holds the stats dict of a finished cProfile.Profile in the form pstats.Stats loads"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ChunkProfile():
+    """What profiled() gathered: a pstats stats dict and a Counter of collapsed stacks"""
+
+    def __init__(self):
+        self.stats  = {}
+        self.stacks = Counter()
+
+
+class StackSampler():
+    """ Counts the stacks SIGPROF interrupts, from the outermost frame running root_code in,
+        as 'file:function;file:function...' strings
+    """
+
+    def __init__(self, stacks, root_code=None, interval=SAMPLE_INTERVAL):
+        self.stacks    = stacks
+        self.root_code = root_code
+        self.interval  = interval
+        self.handler   = None
+
+    def sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append("{}:{}".format(os.path.basename(code.co_filename), code.co_name))
+            if code is self.root_code:
+                break
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self.handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.handler)
+
+
+@contextmanager
+def profiled(root_code=None):
+    """ profiles the code run inside the context, yielding a ChunkProfile that's filled in
+        when it closes, with stacks sampled from the frame running root_code
+    """
+    chunk    = ChunkProfile()
+    profiler = cProfile.Profile()
+    sampler  = StackSampler(chunk.stacks, root_code) if hasattr(signal, 'setitimer') else None
+    if sampler:
+        sampler.start()
+    profiler.enable()
+    try:
+        yield chunk
+    finally:
+        profiler.disable()
+        if sampler:
+            sampler.stop()
+        profiler.create_stats()
+        chunk.stats = profiler.stats
+
+
+class RunProfile():
+    """The merged profile of every chunk in a run"""
+
+    def __init__(self):
+        self.stats  = None
+        self.stacks = Counter()
+
+    def merge(self, chunk):
+        if self.stats is None:
+            self.stats = pstats.Stats(StatsData(chunk.stats))
+        else:
+            self.stats.add(StatsData(chunk.stats))
+        self.stacks.update(chunk.stacks)
+
+    def write(self, prefix):
+        """writes PREFIX.pstats and PREFIX.collapsed, returning their paths"""
+        paths = prefix + '.pstats', prefix + '.collapsed'
+        if self.stats is not None:
+            self.stats.dump_stats(paths[0])
+        with open(paths[1], 'w') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write("{} {}\n".format(stack, count))
+        return paths
+
+    def summary(self, limit=15):
+        """returns the functions with the most time spent in them, as pstats prints them"""
+        stream = StringIO()
+        if self.stats is not None:
+            self.stats.stream = stream
+            self.stats.sort_stats('tottime').print_stats(limit)
+        return stream.getvalue()
@@ -0,0 +1,137 @@
+"""Replays stored games without rendering them, across worker processes, to check them
+
+   Games come from a server's game file (as HanabiLocalFileServer keeps) or a hanabilog game
+   log, as (name, seed, num_players, moves, expected) records, where moves are move strings or
+   codes and expected is the (score, lives) the game was recorded finishing with, if known.
+   Each replay reports the final state with a checksum of it, and the first illegal move or
+   outcome that doesn't match the record, so a rule change can be checked against an archive.
+
+   run as `python hanabireplay.py [--log PATH] [--server-file PATH] [--workers N]`
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from collections import namedtuple
+from itertools import islice
+from multiprocessing import Pool
+
+from hanabi import HanabiGame
+from hanabirunner import apply_move, CHUNK_SIZE
+from hanabilog import GameLog
+
+ReplayRecord = namedtuple('ReplayRecord', ['name', 'seed', 'num_players', 'moves', 'expected'])
+ReplayResult = namedtuple('ReplayResult', ['name', 'seed', 'num_players', 'turns', 'score',
+                                           'lives', 'over', 'checksum', 'error'])
+
+
+def replay_moves(hanabi, moves):
+    """applies move strings or codes to hanabi in turn, without describing them"""
+    for move in moves:
+        apply_move(hanabi, move)
+
+
+def checksum(hanabi):
+    """returns a short hash of everything about the game's state that moves can change"""
+    return hashlib.sha1(repr(hanabi.snapshot()).encode()).hexdigest()[:16]
+
+
+def replay_game(record):
+    """returns the ReplayResult of replaying a ReplayRecord"""
+    hanabi = HanabiGame(record.num_players, record.seed)
+    error  = None
+    for move in record.moves:
+        if hanabi.is_game_over():
+            error = "move {!r} made after the game ended at turn {}".format(move, hanabi.turn)
+            break
+        try:
+            code = hanabi.move_code(move) if isinstance(move, str) else move
+        except (ValueError, IndexError) as e:
+            error = "illegal move {!r} at turn {}: {}".format(move, hanabi.turn,
+                                                                  str(e) or type(e).__name__)
+            break
+        if code not in hanabi.legal_moves():
+            error = "illegal move {!r} at turn {}: not one of the legal moves".format(
+                    move, hanabi.turn)
+            break
+        hanabi.apply(code)
+    if error is None and record.expected is not None \
+       and tuple(record.expected) != (hanabi.score(), hanabi.lives):
+        error = "finished with score {} and lives {}, recorded as {} and {}".format(
+                hanabi.score(), hanabi.lives, *record.expected)
+    return ReplayResult(record.name, record.seed, record.num_players, hanabi.turn,
+                        hanabi.score(), hanabi.lives, hanabi.is_game_over(), checksum(hanabi),
+                        error)
+
+
+def replay_chunk(records):
+    return [replay_game(record) for record in records]
+
+
+def iter_replays(records, workers=None, chunk_size=CHUNK_SIZE):
+    """yields the ReplayResult of each record in order, replayed over workers processes"""
+    records = iter(records)
+    chunks  = iter(lambda: list(islice(records, chunk_size)), [])
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for chunk in chunks:
+            yield from replay_chunk(chunk)
+        return
+    with Pool(workers) as pool:
+        for results in pool.imap(replay_chunk, chunks):
+            yield from results
+
+
+def server_file_records(path):
+    """yields a ReplayRecord for each game in a server's game file, named by its title"""
+    with open(path, encoding='utf-8') as file:
+        games = json.load(file)
+    for title, content in games.items():
+        yield ReplayRecord(title, content['seed'], content['num_players'], content['moves'],
+                           None)
+
+
+def game_log_records(path):
+    """yields a ReplayRecord for each game in a hanabilog game log, named by its place in it"""
+    with GameLog(path) as log:
+        for i, record in enumerate(log):
+            yield ReplayRecord("{}#{}".format(record.bot, i), record.seed, record.num_players,
+                               record.moves, (record.score, record.lives))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="replays stored games and checks them")
+    parser.add_argument('--log', action='append', default=[], metavar='PATH',
+                        help="game log to replay, can be given more than once")
+    parser.add_argument('--server-file', action='append', default=[], metavar='PATH',
+                        help="server game file to replay, can be given more than once")
+    parser.add_argument('--workers', type=int, help="processes to replay on, default one per cpu")
+    parser.add_argument('--format', choices=('text', 'json'), default='text')
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    def records():
+        for path in args.log:
+            yield from game_log_records(path)
+        for path in args.server_file:
+            yield from server_file_records(path)
+
+    games, errors = 0, 0
+    for result in iter_replays(records(), args.workers):
+        games  += 1
+        errors += result.error is not None
+        if args.format == 'json':
+            print(json.dumps(result._asdict()))
+        elif result.error:
+            print("{} ({}): {}".format(result.name, result.seed, result.error))
+        else:
+            print("{} ({}): {} players, turn {}, score {}, lives {}{} {}".format(
+                  result.name, result.seed, result.num_players, result.turns, result.score,
+                  result.lives, ", over" if result.over else "", result.checksum))
+    sys.stderr.write("{} games replayed, {} with errors\n".format(games, errors))
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
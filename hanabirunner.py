@@ -0,0 +1,225 @@
+"""Plays runs of bot games, spread over worker processes
+
+   A run is the chain of seeds bot_game() has always played, each game's seed drawn from
+   the previous game's stream, so it's the same games in the same order however many
+   processes share the work.
+
+   Bots only explain themselves for the seeds asked for in trace_seeds, whose trace records
+   come back to the parent with the scores, so the rest of the run pays nothing for them.
+
+   Given a hanabimetrics.Metrics, each worker times the hot methods of the games it plays and
+   sends its figures back to be merged into it. A hanabiprofile.RunProfile gathers the workers'
+   profiles in the same way, and a hanabilog.GameLog has every game's moves appended to it.
+
+   iter_games() hands results over as they arrive, and ScoreTally sums them up as it goes, so
+   a run of any length can be followed and reported on in constant memory.
+"""
+import os
+from math import sqrt
+from collections import namedtuple
+from itertools import islice
+from contextlib import ExitStack
+from multiprocessing import Pool
+from time import perf_counter
+
+from hanabi import HanabiGame, iter_seeds, make_seed, seed_rng
+from hanabimetrics import instrumented
+from hanabiprofile import profiled
+from hanabilog import GameRecord
+
+CHUNK_SIZE = 100  # games handed to a worker at a time
+
+# seconds is the time the game took to play, including making its bots
+GameResult = namedtuple('GameResult', ['seed', 'score', 'lives', 'turns', 'seconds'])
+
+
+def apply_move(hanabi, move):
+    """ Applies a move string or move code to the supplied hanabi game without describing it,
+        returning the move's code
+    """
+    move = hanabi.move_code(move) if isinstance(move, str) else move
+    hanabi.apply(move)
+    return move
+
+
+def play_game(bot_class, num_players, seed, stop_early=False, tracer=None, moves=None):
+    """ plays a game with a bot_class in each seat, or bot_class[p] in seat p if it's a list
+        or tuple of them, returning its GameResult, with the bots' reasoning sent to tracer and
+        the move codes made appended to moves if they're given
+    """
+    start   = perf_counter()
+    hanabi  = HanabiGame(num_players, seed, stop_early)
+    seating = bot_class if isinstance(bot_class, (list, tuple)) else [bot_class] * num_players
+    bots    = [seating[p](hanabi, player_id=p, tracer=tracer) for p in range(num_players)]
+    while not hanabi.is_game_over():
+        move = apply_move(hanabi, bots[hanabi.current_player_id()].get_move())
+        if moves is not None:
+            moves.append(move)
+    return GameResult(seed, hanabi.score(), hanabi.lives, hanabi.turn, perf_counter() - start)
+
+
+def play_chunk(job):
+    """ plays the games of a (bot_class, num_players, seeds, stop_early, trace_seeds, record,
+        instrument, profile) job, returning their results, a (seed, records) trace for each
+        seed in trace_seeds, GameRecords of the games if record is set, and the Metrics of
+        their hot methods and their ChunkProfile if instrument and profile are set
+    """
+    game_args, instrument, profile = job[:-2], job[-2], job[-1]
+    metrics, chunk_profile = None, None
+    with ExitStack() as stack:
+        if instrument:
+            metrics = stack.enter_context(instrumented())
+        if profile:
+            chunk_profile = stack.enter_context(profiled(play_games.__code__))
+        results, traces, game_records = play_games(*game_args)
+    return results, traces, game_records, metrics, chunk_profile
+
+
+def play_games(bot_class, num_players, seeds, stop_early, trace_seeds, record):
+    results, traces, game_records = [], [], []
+    for seed in seeds:
+        tracer = None
+        if seed in trace_seeds:
+            records = []
+            tracer  = records.append
+            traces.append((seed, records))
+        moves  = [] if record else None
+        result = play_game(bot_class, num_players, seed, stop_early, tracer, moves)
+        results.append(result)
+        if record:
+            game_records.append(GameRecord(seed, bot_class.__name__, num_players, result.score,
+                                           result.lives, moves))
+    return results, traces, game_records
+
+
+def make_jobs(bot_class, num_players, seeds, stop_early, trace_seeds, record, instrument,
+              profile, chunk_size):
+    seeds = iter(seeds)
+    while True:
+        chunk = list(islice(seeds, chunk_size))
+        if not chunk:
+            return
+        yield (bot_class, num_players, chunk, stop_early, trace_seeds, record, instrument,
+               profile)
+
+
+def run_games(*args, **kwargs):
+    """returns a list of the GameResults iter_games() yields for the same arguments"""
+    return list(iter_games(*args, **kwargs))
+
+
+def iter_games(bot_class, num_players, seed=None, reps=1, workers=None, stop_early=False,
+               chunk_size=CHUNK_SIZE, trace_seeds=(), on_trace=None, seeds=None, metrics=None,
+               profile=None, log=None):
+    """ plays reps games from seed, as bot_game() does, or else a game for each of seeds, over
+        workers processes (one per cpu by default) and yields their GameResults in order
+
+        games whose seed is in trace_seeds are traced, and on_trace(seed, records) is called
+        with each one's trace records in seed order. The timings of hot methods are merged
+        into metrics if it's given, the games' profiles into profile, and a GameRecord of
+        each game is appended to log.
+    """
+    if seeds is None:
+        seeds = iter_seeds(seed if seed is not None else make_seed(seed_rng), reps)
+    workers     = workers or os.cpu_count()
+    trace_seeds = frozenset(trace_seeds)
+    jobs        = make_jobs(bot_class, num_players, seeds, stop_early, trace_seeds,
+                            log is not None, metrics is not None, profile is not None,
+                            chunk_size)
+    if workers == 1:
+        yield from gather(map(play_chunk, jobs), on_trace, metrics, profile, log)
+        return
+    with Pool(workers) as pool:
+        # imap takes jobs as workers free up, so seeding the run overlaps with playing it
+        yield from gather(pool.imap(play_chunk, jobs), on_trace, metrics, profile, log)
+
+
+def gather(chunks, on_trace, metrics, profile, log):
+    """ yields the results of played chunks in order, passing their traces to on_trace,
+        merging their timings into metrics and their profiles into profile, and logging them
+    """
+    for chunk_results, traces, game_records, chunk_metrics, chunk_profile in chunks:
+        for seed, records in traces:
+            on_trace(seed, records)
+        for game_record in game_records:
+            log.append(game_record)
+        if chunk_metrics is not None:
+            metrics.merge(chunk_metrics)
+        if chunk_profile is not None:
+            profile.merge(chunk_profile)
+        yield from chunk_results
+
+
+class ScoreTally():
+    """ Running figures for a stream of (seed, score, lives, ...) results in constant memory: a
+        count and first example seed per score, how many games died, and Welford's running
+        mean and variance. Scores are whole numbers 0-25, so the counts give exact quantiles.
+    """
+
+    def __init__(self, results=()):
+        self.counts   = [0] * 26
+        self.examples = [None] * 26
+        self.games    = 0
+        self.died     = 0
+        self.mean     = 0.0
+        self.m2       = 0.0  # sum of squared differences from the mean
+        self.turns    = 0
+        self.seconds  = 0.0
+        for result in results:
+            self.add(result)
+
+    def add(self, result):
+        seed, score, lives = result[:3]
+        if not self.counts[score]:
+            self.examples[score] = seed
+        self.counts[score] += 1
+        self.games         += 1
+        self.died          += lives < 0
+        delta               = score - self.mean
+        self.mean          += delta / self.games
+        self.m2            += delta * (score - self.mean)
+        if len(result) > 3:
+            self.turns   += result.turns
+            self.seconds += result.seconds
+
+    def variance(self):
+        return self.m2 / (self.games - 1) if self.games > 1 else 0.0
+
+    def stdev(self):
+        return sqrt(self.variance())
+
+    def nth_score(self, n):
+        """returns the nth lowest score, counting from 0"""
+        for score, count in enumerate(self.counts):
+            n -= count
+            if n < 0:
+                return score
+
+    def quantile(self, q):
+        """returns the score q of the way up the sorted scores, 0.5 being the low median"""
+        return self.nth_score(int(q * (self.games - 1)))
+
+    def median(self):
+        """returns the median as statistics.median() would"""
+        middle = self.games // 2
+        if self.games % 2:
+            return self.nth_score(middle)
+        return (self.nth_score(middle - 1) + self.nth_score(middle)) / 2
+
+    def render(self, max_width=50):
+        """returns the text histogram bot runs have always shown, or a line saying there's none"""
+        if not self.games:
+            return "no games played"
+        op        = []
+        max_count = max(self.counts)
+        for score, count in enumerate(self.counts):
+            bar_width = max_width * count // max_count
+            example   = "eg: {}".format(self.examples[score]) if count else ''
+            bar_text  = '{: >3} {} {}'.format(count if count else '', "█" * bar_width, example)
+            op.append("{: >2} : {}".format(score, bar_text))
+        op.append("{:.1%} of games ran out of lives".format(self.died / self.games))
+        if self.games > 1:
+            op.append("median: {}, mean: {:.1f}, stdev: {:.1f}".format(self.median(),
+                                                                       self.mean,
+                                                                       self.stdev()))
+        return "\n".join(op)
@@ -0,0 +1,190 @@
+"""Exact search of the last round of a game, once the deck is empty
+
+   With no cards left to draw nothing is left to chance, so the best score each move can still
+   lead to is found by searching every line of play to the final turn, memoising positions in
+   a transposition table. Positions are keyed canonically: hands as sorted card kinds, with
+   any kind that's already been played counted as the same junk card, since which slot a card
+   is in and which junk it is make no difference to what can be scored.
+
+   solve() searches with every card seen by everyone, as the bound on what could have been
+   scored from where the deck ran out. solve_fair() leaves the current player's own hand
+   unknown beyond what they've been told, averaging over every way it could be arranged, so
+   a bot can play its last round with it. Only plays, discards and one hint per turn are
+   searched: with every card seen, which hint is given makes no difference, and a card
+   that can't be played is never worth playing when it could be kept or discarded instead.
+"""
+from collections import namedtuple
+from itertools import permutations
+from time import perf_counter
+
+from hanabi import HanabiGame, CARD_BIT, CARD_KIND, PLAY_MOVE, DISCARD_MOVE, HINT_MOVE
+
+JUNK        = -1    # kind of a card that's already been played
+TIME_LIMIT  = 0.05  # seconds a bot's solve can take before it gives up
+CHECK_EVERY = 1000  # positions searched between looks at the clock
+
+Solution      = namedtuple('Solution', ['score', 'move'])
+
+
+class SolveTimeout(Exception):
+    """raised inside a search that's run past its deadline"""
+
+
+class EndgameSolver():
+    """ Searches positions of a finished deck's last round, keeping their best final scores in
+        a transposition table that can be reused across solves of the same game
+    """
+
+    def __init__(self, max_clocks=HanabiGame.max_clocks, time_limit=None):
+        self.max_clocks = max_clocks
+        self.time_limit = time_limit
+        self.table      = {}
+        self.deadline   = None
+        self.searched   = 0
+
+    def start(self):
+        self.deadline = None
+        if self.time_limit is not None:
+            self.deadline = perf_counter() + self.time_limit
+
+    def canonical(self, heights, hands):
+        """returns hands as sorted tuples of kinds, with kinds already played made JUNK"""
+        return tuple(tuple(sorted(kind if kind != JUNK and kind % 5 >= heights[kind // 5]
+                                  else JUNK for kind in hand)) for hand in hands)
+
+    def children(self, heights, hands, clocks, player_id):
+        """yields (heights, hands, clocks) after each distinct move player_id could make"""
+        hand = hands[player_id]
+        for i, kind in enumerate(hand):
+            if kind == JUNK or (i and kind == hand[i - 1]):
+                continue
+            if kind % 5 == heights[kind // 5]:
+                after    = list(heights)
+                after[kind // 5] += 1
+                gained   = kind % 5 == 4 and clocks < self.max_clocks
+                yield tuple(after), self.without(hands, player_id, i), clocks + gained
+        if clocks:
+            yield heights, hands, clocks - 1
+        if clocks < self.max_clocks:
+            for i, kind in enumerate(hand):
+                if not i or kind != hand[i - 1]:
+                    yield heights, self.without(hands, player_id, i), clocks + 1
+
+    def without(self, hands, player_id, index):
+        hand = hands[player_id]
+        return hands[:player_id] + (hand[:index] + hand[index + 1:],) + hands[player_id + 1:]
+
+    def best(self, heights, hands, clocks, player_id, turns_left):
+        """returns the best final score from a position, with hands in canonical form"""
+        points = sum(heights)
+        if not turns_left or points == 25:
+            return points
+        key = heights, hands, clocks, player_id, turns_left
+        if key in self.table:
+            return self.table[key]
+        self.searched += 1
+        if self.deadline is not None and not self.searched % CHECK_EVERY \
+           and perf_counter() > self.deadline:
+            raise SolveTimeout
+        next_id = (player_id + 1) % len(hands)
+        score   = points
+        for child_heights, child_hands, child_clocks in self.children(heights, hands, clocks,
+                                                                      player_id):
+            if child_heights is not heights:
+                child_hands = self.canonical(child_heights, child_hands)
+            score = max(score, self.best(child_heights, child_hands, child_clocks, next_id,
+                                         turns_left - 1))
+            if score == 25:
+                break
+        self.table[key] = score
+        return score
+
+    def move_scores(self, hanabi, hand):
+        """ yields (move code, best final score) for the current player's moves, taking their
+            hand to be hand, a list of card kinds by slot
+        """
+        player_id  = hanabi.current_player_id()
+        heights    = tuple(hanabi.heights)
+        hands      = [[CARD_KIND[card] for card in cards] for cards in hanabi.hand_ids]
+        hands[player_id] = hand
+        turns_left = hanabi.final_turn - hanabi.turn - 1
+        next_id    = (player_id + 1) % hanabi.num_players
+        clocks     = hanabi.clocks
+        for i, kind in enumerate(hand):
+            others = self.canonical(heights, [cards[:i] + cards[i + 1:] if p == player_id
+                                              else cards for p, cards in enumerate(hands)])
+            if kind % 5 == heights[kind // 5]:
+                after    = list(heights)
+                after[kind // 5] += 1
+                gained   = kind % 5 == 4 and clocks < self.max_clocks
+                yield PLAY_MOVE + i, self.best(tuple(after), self.canonical(after, others),
+                                               clocks + gained, next_id, turns_left)
+            elif hanabi.lives:
+                yield PLAY_MOVE + i, self.best(heights, others, clocks, next_id, turns_left)
+            else:
+                yield PLAY_MOVE + i, sum(heights)  # out of lives
+            if clocks < self.max_clocks:
+                yield DISCARD_MOVE + i, self.best(heights, others, clocks + 1, next_id,
+                                                  turns_left)
+        if clocks:
+            hint = next(move for move in hanabi.legal_moves() if move >= HINT_MOVE)
+            yield hint, self.best(heights, self.canonical(heights, hands), clocks - 1, next_id,
+                                  turns_left)
+
+
+def check_endgame(hanabi):
+    if hanabi.final_turn is None:
+        raise ValueError("the deck isn't empty yet")
+
+
+def solve(hanabi, solver=None):
+    """ returns the Solution of the best final score the current player's move can lead to
+        with every card seen, and that move, or None if solver's time limit runs out first
+    """
+    check_endgame(hanabi)
+    if hanabi.is_game_over():
+        return Solution(hanabi.score(), None)
+    solver = solver or EndgameSolver(hanabi.max_clocks)
+    solver.start()
+    hand   = [CARD_KIND[card] for card in hanabi.hand_ids[hanabi.current_player_id()]]
+    try:
+        move, score = max(solver.move_scores(hanabi, hand), key=lambda item: item[1])
+    except SolveTimeout:
+        return None
+    return Solution(score, move)
+
+
+def arrangements(hanabi, player_id):
+    """ returns each distinct way player_id's hand could be arranged given what they've been
+        told, as lists of card kinds by slot. With the deck empty they can work out which
+        cards they hold, just not which is where.
+    """
+    cards = hanabi.hand_ids[player_id]
+    masks = hanabi.hand_masks[player_id]
+    fits  = set()
+    for order in permutations(cards):
+        if all(CARD_BIT[card] & mask for card, mask in zip(order, masks)):
+            fits.add(tuple(CARD_KIND[card] for card in order))
+    return [list(kinds) for kinds in sorted(fits)]
+
+
+def solve_fair(hanabi, solver=None):
+    """ returns the Solution of the current player's move with the best mean final score over
+        every arrangement of their hand, or None if solver's time limit runs out first. The
+        score is that mean.
+    """
+    check_endgame(hanabi)
+    if hanabi.is_game_over():
+        return Solution(hanabi.score(), None)
+    solver  = solver or EndgameSolver(hanabi.max_clocks)
+    solver.start()
+    hands   = arrangements(hanabi, hanabi.current_player_id())
+    totals  = {}
+    try:
+        for hand in hands:
+            for move, score in solver.move_scores(hanabi, hand):
+                totals[move] = totals.get(move, 0) + score
+    except SolveTimeout:
+        return None
+    move = max(totals, key=totals.get)
+    return Solution(totals[move] / len(hands), move)
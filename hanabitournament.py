@@ -0,0 +1,231 @@
+"""Tournaments of different bots sharing a table, over a shared set of seeds
+
+   Every seed is played once per seating, a tuple of bot classes by seat. Seatings are either
+   round robin, every way of filling the seats from the bots, or random, one drawn per seed.
+   Games are played over worker processes and their results kept in a cache keyed by seed,
+   seating and each seated bot's version, a hash of its source and its bases', the helpers
+   they use and the other modules they depend on, so running a tournament again only replays
+   the games of bots whose code, or the engine or helpers they use, has changed.
+
+   run as `python hanabitournament.py BasicBot CheatBot [--players N] [--reps N] [--cache FILE]`
+"""
+import io
+import os
+import sys
+import json
+import random
+import inspect
+import hashlib
+import argparse
+import tokenize
+from collections import defaultdict, namedtuple
+from itertools import product, combinations
+from multiprocessing import Pool
+
+from hanabi import iter_seeds, make_seed, seed_rng
+from hanabirunner import play_game, ScoreTally, CHUNK_SIZE
+from hanabibot import find_bot
+
+TournamentGame = namedtuple('TournamentGame', ['seed', 'seating', 'score', 'lives', 'turns'])
+
+
+def source_names(value):
+    """returns the names used in the source of a function or class, outside strings and comments"""
+    tokens = tokenize.generate_tokens(io.StringIO(inspect.getsource(value)).readline)
+    return {token.string for token in tokens if token.type == tokenize.NAME}
+
+
+def bot_helpers(bot_class):
+    """ returns the classes bot_class inherits from, and the functions, classes and constants
+        of their modules that any of those use, directly or through each other, as sorted
+        (name, value) pairs
+    """
+    found = {(cls.__module__, cls.__qualname__): cls
+             for cls in bot_class.__mro__ if cls is not object}
+    todo  = list(found.values())
+    while todo:
+        value  = todo.pop()
+        module = sys.modules[value.__module__]
+        for name in source_names(value):
+            key    = (module.__name__, name)
+            helper = inspect.unwrap(vars(module)[name]) if name in vars(module) else None
+            if key in found or helper is None:
+                continue
+            if inspect.isfunction(helper) or inspect.isclass(helper):
+                if helper.__module__ == module.__name__:
+                    found[key] = helper
+                    todo.append(helper)
+            elif isinstance(helper, (int, float, str, bytes, tuple, frozenset)):
+                found[key] = helper
+    return [("{}.{}".format(*key), found[key]) for key in sorted(found)]
+
+
+def bot_modules(bot_class):
+    """ returns the modules of this package that the modules bot_class, or anything it
+        inherits from, is defined in import from, and so on, such as hanabi, leaving out
+        those defining modules themselves, whose parts bot_helpers() picks out instead
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    defining  = {cls.__module__ for cls in bot_class.__mro__ if cls is not object}
+    modules   = {}
+    todo      = [sys.modules[name] for name in defining]
+    while todo:
+        module = todo.pop()
+        if module is None or module.__name__ in modules or not hasattr(module, '__file__') \
+           or os.path.dirname(os.path.abspath(module.__file__)) != directory:
+            continue
+        modules[module.__name__] = module
+        todo.extend(inspect.getmodule(value) for value in vars(module).values())
+    return [modules[name] for name in sorted(modules) if name not in defining]
+
+
+def bot_version(bot_class):
+    """ returns a short hash of the source of bot_class, the classes it inherits from and the
+        helpers bot_helpers() finds they use, and of the modules bot_modules() finds, so
+        editing a bot changes the versions of it and the bots built on it but no others,
+        while editing the engine or a shared helper changes the versions of every bot using it
+    """
+    sources = [inspect.getsource(value) if inspect.isfunction(value) or inspect.isclass(value)
+               else "{} = {!r}\n".format(name, value) for name, value in bot_helpers(bot_class)]
+    sources += [inspect.getsource(module) for module in bot_modules(bot_class)]
+    return hashlib.sha1("".join(sources).encode()).hexdigest()[:12]
+
+
+def round_robin_seatings(bot_classes, num_players):
+    """returns every seating of num_players drawn from bot_classes, allowing repeats"""
+    return list(product(bot_classes, repeat=num_players))
+
+
+def schedule(bot_classes, num_players, seeds, seating='round-robin'):
+    """ yields (seed, seating) for each game of a tournament: every round robin seating for
+        each seed, or a random seating per seed, drawn from the seed so it's repeatable
+    """
+    seatings = round_robin_seatings(bot_classes, num_players)
+    for seed in seeds:
+        if seating == 'random':
+            yield seed, random.Random(seed).choice(seatings)
+        else:
+            for each in seatings:
+                yield seed, each
+
+
+def cache_key(seed, seating, versions, stop_early=False):
+    bots = ",".join("{}:{}".format(bot.__name__, versions[bot]) for bot in seating)
+    return "{} {}{}".format(seed, bots, " stop_early" if stop_early else "")
+
+
+def play_seatings(job):
+    """plays the (seed, seating) games of a (num_players, games, stop_early) job"""
+    num_players, games, stop_early = job
+    return [play_game(seating, num_players, seed, stop_early) for seed, seating in games]
+
+
+def play_jobs(jobs, workers):
+    if workers == 1:
+        yield from map(play_seatings, jobs)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(play_seatings, jobs)
+
+
+class ResultCache():
+    """ [score, lives, turns] of tournament games by cache_key(), loaded from and saved to a
+        json file at path, or only kept in memory without one
+    """
+
+    def __init__(self, path=None):
+        self.path    = path
+        self.results = {}
+        self.added   = 0
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self.results = json.load(file)
+
+    def add(self, key, result):
+        self.results[key] = [result.score, result.lives, result.turns]
+        self.added       += 1
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as file:
+                json.dump(self.results, file, sort_keys=True)
+
+
+def run_tournament(bot_classes, num_players, seed=None, reps=100, seating='round-robin',
+                   workers=None, stop_early=False, cache=None, chunk_size=CHUNK_SIZE):
+    """ plays a tournament of bot_classes on reps seeds from seed, returning a TournamentGame
+        per game in schedule order. Games found in cache, a ResultCache, aren't played again,
+        and those that are played are added to it and saved.
+    """
+    cache    = cache if cache is not None else ResultCache()
+    versions = {bot: bot_version(bot) for bot in bot_classes}
+    seeds    = iter_seeds(seed if seed is not None else make_seed(seed_rng), reps)
+    games    = list(schedule(bot_classes, num_players, seeds, seating))
+    keys     = [cache_key(seed, each, versions, stop_early) for seed, each in games]
+    missing  = [(game, key) for game, key in zip(games, keys) if key not in cache.results]
+    chunks   = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    jobs     = [(num_players, [game for game, key in chunk], stop_early) for chunk in chunks]
+    try:
+        for chunk, results in zip(chunks, play_jobs(jobs, workers or os.cpu_count())):
+            for (game, key), result in zip(chunk, results):
+                cache.add(key, result)
+    finally:
+        cache.save()
+    return [TournamentGame(seed, each, *cache.results[key])
+            for (seed, each), key in zip(games, keys)]
+
+
+def tally_games(games):
+    """ returns ScoreTallies of games by bot, by unordered pair of different bots at the same
+        table and by seating, with bot names for keys, each game counting once in each
+    """
+    by_bot, by_pairing, by_seating = (defaultdict(ScoreTally) for _ in range(3))
+    for game in games:
+        names  = [bot.__name__ for bot in game.seating]
+        result = game.seed, game.score, game.lives
+        for name in set(names):
+            by_bot[name].add(result)
+        for pairing in combinations(sorted(set(names)), 2):
+            by_pairing[pairing].add(result)
+        by_seating[tuple(names)].add(result)
+    return by_bot, by_pairing, by_seating
+
+
+def report(games):
+    """returns a table of the mean scores of games by bot, pairing and seating"""
+    op = ["{:50} {:>7} {:>7} {:>7} {:>7}".format('', 'games', 'mean', 'stdev', 'died')]
+    for title, tallies in zip(("by bot", "by pairing", "by seating"), tally_games(games)):
+        op.append(title)
+        for key, tally in sorted(tallies.items(), key=lambda item: -item[1].mean):
+            name = key if isinstance(key, str) else " + ".join(key)
+            op.append("  {:48} {:7d} {:7.2f} {:7.2f} {:6.1%}".format(
+                      name, tally.games, tally.mean, tally.stdev(), tally.died / tally.games))
+    return "\n".join(op)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('bots', type=find_bot, nargs='+', help="bot classes, eg. BasicBot")
+    parser.add_argument('--players', type=int, default=2, choices=range(2, 6))
+    parser.add_argument('--seed', help="first seed of the shared seeds, random if not given")
+    parser.add_argument('--reps', type=int, default=100, help="seeds to play")
+    parser.add_argument('--seating', choices=('round-robin', 'random'), default='round-robin',
+                        help="every seating for each seed, or one at random")
+    parser.add_argument('--cache', metavar='FILE', help="json file to keep results in")
+    parser.add_argument('--workers', type=int, help="processes to play on, default one per cpu")
+    parser.add_argument('--stop-early', action='store_true',
+                        help="end games once the score can't go up")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    if args.cache and not args.seed:
+        sys.exit("give a --seed for the cache to find games from a previous run")
+
+    cache = ResultCache(args.cache)
+    games = run_tournament(args.bots, args.players, args.seed, args.reps, args.seating,
+                           args.workers, args.stop_early, cache)
+    print("{} games of {} players, {} played and {} from the cache".format(
+          len(games), args.players, cache.added, len(games) - cache.added))
+    print(report(games))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,21 @@
 import os
-import sys
 import textwrap
 import inspect
-from io import StringIO
+import sys
 from sys import argv
-from time import sleep
-from statistics import mean, median, stdev
+from time import perf_counter
 
 from hanabi import HanabiGame, HanabiSession, HanabiGistServer, \
-    HanabiLocalFileServer, MockHanabiServer
+    HanabiLocalFileServer, MockHanabiServer, make_seed, seed_rng
+from hanabirunner import iter_games, ScoreTally
+from hanabimetrics import Metrics
+from hanabiprofile import RunProfile
+from hanabilog import GameLog
+from hanabireplay import replay_moves
 import hanabibot
 
+REDRAW_SECONDS = 0.5  # between updates of a bot run's histogram
+
 
 def main():
     seed = argv[1] if len(argv) > 1 else None
@@ -33,7 +38,11 @@ def main():
         bot_class   = getattr(hanabibot, bot_name)
         num_players = int(input("How many instances of {} (2-5)? ".format(bot_name)) or 2)
         if(reps > 1):
-            bot_game(bot_class, num_players, seed, reps)
+            bot_game(bot_class, num_players, seed, reps,
+                     instrument=bool(os.environ.get('HANABI_METRICS')),
+                     profile_prefix=os.environ.get('HANABI_PROFILE'),
+                     log_path=os.environ.get('HANABI_LOG'))
+            return
         hanabi = HanabiGame(num_players, seed)
     else:
         hanabi = HanabiGame(2, seed)
@@ -42,56 +51,62 @@ def main():
     print_end_game(hanabi, move_descriptions)
 
 
-def bot_game(bot_class, num_players, seed, reps):
-    scores = []
-
+def bot_game(bot_class, num_players, seed, reps, stop_early=False, workers=None,
+             instrument=False, profile_prefix=None, log_path=None):
+    """ plays reps games from seed and prints a histogram of their scores, the games are
+        shared between workers processes, one per cpu by default. On a terminal the histogram
+        is redrawn as the games come in. With instrument set the time spent in the engine's
+        and bots' hot methods is printed too, and with profile_prefix the games are profiled
+        to PREFIX.pstats and PREFIX.collapsed. Given log_path, every game is appended to the
+        hanabilog.GameLog there.
+    """
+    seed  = seed if seed is not None else make_seed(seed_rng)
     title = "{} x {} playing, starting seed {} for {} reps"\
              .format(num_players, bot_class.__name__, seed, reps)
     print(title)
-    for i in range(reps):
-        sys.stdout = StringIO()
-        hanabi     = HanabiGame(num_players, seed)
-        while not hanabi.is_game_over():
-            bot = bot_class(hanabi)
-            play_move(hanabi, bot.get_move())
-        scores.append((seed, hanabi.score(), hanabi.lives))
-        seed       = hanabi.random_seed()
-        sys.stdout = sys.__stdout__
-
-    # these two lines can be uncommented if the render block is moved into the above loop
-    # os.system('clear')
-    # print(title)
-    print(render_scores(scores))
-    sleep(0.1)
-    exit()
+    live    = sys.stdout.isatty()
+    tally   = ScoreTally()
+    drawn   = perf_counter()
+    metrics = Metrics() if instrument else None
+    profile = RunProfile() if profile_prefix else None
+    log     = GameLog(log_path) if log_path else None
+    for result in iter_games(bot_class, num_players, seed, reps, workers, stop_early,
+                             metrics=metrics, profile=profile, log=log):
+        tally.add(result)
+        if live and perf_counter() - drawn > REDRAW_SECONDS:
+            draw_scores(title, tally)
+            drawn = perf_counter()
+    if log:
+        log.close()
+    if live:
+        draw_scores(title, tally)
+    else:
+        print(tally.render())
+    if metrics:
+        print(metrics.summary(per=tally.turns))
+    if profile:
+        print(profile.summary())
+        print("profile written to {} and {}".format(*profile.write(profile_prefix)))
+
+
+def draw_scores(title, tally):
+    os.system('clear')
+    print(title)
+    print(tally.render())
+    print("{} games played".format(tally.games))
 
 
 def render_scores(scores):
-    freq_score = []
-    max_width  = 50
-    op         = []
-    for i in range(26):
-        freq_score.append(len([s for s in scores if s[1] == i]))
-    for i in range(26):
-        bar_width = max_width * freq_score[i] // max(freq_score)
-        examples  = [s[0] for s in scores if s[1] == i]
-        example   = ("eg: {}".format(examples[0])) if examples else ''
-        freq      = freq_score[i] if freq_score[i] else ''
-        bar_text  = '{: >3} {} {}'.format(freq, "█" * bar_width, example)
-        op.append("{: >2} : {}".format(i, bar_text))
-    scores_list = [s[1] for s in scores]
-    pc_died     = len([s for s in scores if s[2] < 0]) / len(scores)
-    op.append("{:.1%} of games ran out of lives".format(pc_died))
-    if len(scores_list) > 1:
-        op.append("median: {}, mean: {:.1f}, stdev: {:.1f}".format(median(scores_list),
-                                                                   mean(scores_list),
-                                                                   stdev(scores_list)))
-    return "\n".join(op)
+    """returns a histogram of a list of (seed, score, lives) results"""
+    return ScoreTally(scores).render()
 
 
 def game_loop(hanabi, session, bot_class=None):
     move_descriptions = []
     moves             = []
+    if bot_class:
+        bots = [bot_class(hanabi, player_id=i, tracer=hanabibot.print_trace)
+                for i in range(hanabi.num_players)]
     while not hanabi.is_game_over():
         player_id = hanabi.current_player_id()
 
@@ -109,7 +124,9 @@ def game_loop(hanabi, session, bot_class=None):
             print_player_view(hanabi, move_descriptions, player_id)
 
             if bot_class:
-                move = bot_class(hanabi).get_move()
+                move = bots[player_id].get_move()
+                if not isinstance(move, str):
+                    move = hanabi.move_string(move)
                 input("Bot thinks '{}', press enter to play...".format(move))
             else:
                 move = get_local_move(hanabi, player_id)
@@ -185,6 +202,8 @@ def get_local_move(hanabi, player_id):
 def play_move(hanabi, move):
     """ Applies supplied move to the supplied hanabi game, returning a descriptive string
     """
+    if not isinstance(move, str):
+        move = hanabi.move_string(move)
     if move[0].isdigit():
         hand_id = int(move[0]) - 1
         info = move[1]
@@ -242,8 +261,7 @@ def start_remote_game(seed, server_class, is_rejoin=False):
         player_id = int(input("which player to join as? "))
         session.rejoin_game(game_title, player_id)
         print("Loading moves...")
-        for move in session.list_moves():
-            play_move(session.hanabi, move)
+        replay_moves(session.hanabi, session.list_moves())
     else:
         session.join_game(game_list[int(chosen_game)], player_name)
         session.await_players()
@@ -0,0 +1,148 @@
+"""Plays bot games without prompting and reports on each one, for scripted benchmark runs
+
+   eg. `python run_hanabi.py BasicBot --players 3 --seed aaaaa --reps 1000 --format csv`
+"""
+import os
+import sys
+import json
+import csv
+import argparse
+import platform
+from time import perf_counter
+
+from hanabibot import file_tracer, find_bot
+from hanabirunner import iter_games, GameResult, ScoreTally
+from hanabimetrics import Metrics
+from hanabiprofile import RunProfile
+from hanabilog import GameLog
+
+PROGRESS_SECONDS = 1.0  # between --progress updates
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('bot', type=find_bot, help="bot class, eg. BasicBot")
+    parser.add_argument('--players', type=int, default=2, choices=range(2, 6))
+    seeds = parser.add_mutually_exclusive_group()
+    seeds.add_argument('--seed', help="first seed of the run, random if not given")
+    seeds.add_argument('--seed-file', type=argparse.FileType('r'),
+                       help="file of seeds to play, one per line, instead of a run")
+    parser.add_argument('--reps', type=int, default=1000, help="games in the run")
+    parser.add_argument('--workers', type=int, help="processes to play on, default one per cpu")
+    parser.add_argument('--stop-early', action='store_true',
+                        help="end games once the score can't go up")
+    parser.add_argument('--format', choices=sorted(WRITERS), default='json')
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout)
+    parser.add_argument('--trace-seeds', nargs='+', default=(), metavar='SEED',
+                        help="seeds to record the bots' reasoning for")
+    parser.add_argument('--metrics', action='store_true',
+                        help="time the engine's and bots' hot methods, summarised on stderr")
+    parser.add_argument('--profile', metavar='PREFIX',
+                        help="profile the games to PREFIX.pstats and PREFIX.collapsed")
+    parser.add_argument('--log', metavar='PATH',
+                        help="append every game's moves to the game log at PATH")
+    parser.add_argument('--progress', action='store_true',
+                        help="show games played so far on stderr")
+    parser.add_argument('--trace-file', type=argparse.FileType('w'), default=sys.stderr)
+    return parser.parse_args(argv)
+
+
+def summarise(tally):
+    """returns overall figures for a run from its ScoreTally"""
+    return {
+        'games':   tally.games,
+        'mean':    tally.mean,
+        'median':  tally.median(),
+        'stdev':   tally.stdev(),
+        'p10':     tally.quantile(0.1),
+        'p90':     tally.quantile(0.9),
+        'died':    tally.died / tally.games,
+        'turns':   tally.turns,
+        'seconds': tally.seconds,
+    }
+
+
+def write_json(file, args, results, tally):
+    """writes a report with every game, so unlike the others it holds the whole run in memory"""
+    start = perf_counter()
+    games = [r._asdict() for r in results]
+    report = {
+        'bot':         args.bot.__name__,
+        'num_players': args.players,
+        'seed':        games[0]['seed'],
+        'reps':        len(games),
+        'workers':     args.workers or os.cpu_count(),
+        'stop_early':  args.stop_early,
+        'python':      platform.python_version(),
+        'seconds':     perf_counter() - start,
+        'summary':     summarise(tally),
+        'games':       games,
+    }
+    json.dump(report, file, indent=1)
+    file.write("\n")
+
+
+def write_csv(file, args, results, tally):
+    writer = csv.writer(file)
+    writer.writerow(GameResult._fields)
+    writer.writerows(results)
+
+
+def write_hist(file, args, results, tally):
+    start = perf_counter()
+    for _ in results:
+        pass
+    file.write("{} x {} playing for {} reps in {:.1f}s\n"
+               .format(args.players, args.bot.__name__, tally.games, perf_counter() - start))
+    file.write(tally.render() + "\n")
+
+
+WRITERS = {'json': write_json, 'csv': write_csv, 'hist': write_hist}
+
+
+def tallied(results, tally, progress):
+    """passes results through, adding them to tally and reporting progress if asked"""
+    shown = perf_counter()
+    for result in results:
+        tally.add(result)
+        if progress and perf_counter() - shown > PROGRESS_SECONDS:
+            sys.stderr.write("\r{} games, mean {:.2f}".format(tally.games, tally.mean))
+            shown = perf_counter()
+        yield result
+    if progress:
+        sys.stderr.write("\r{} games, mean {:.2f}\n".format(tally.games, tally.mean))
+
+
+def main(argv=None):
+    args  = parse_args(sys.argv[1:] if argv is None else argv)
+    seeds = None
+    if args.seed_file:
+        seeds = [line.strip() for line in args.seed_file if line.strip()]
+    if seeds == [] or args.reps < 1:
+        sys.exit("no games to play")
+
+    tracer = file_tracer(args.trace_file)
+
+    def on_trace(seed, records):
+        args.trace_file.write("seed {}\n".format(seed))
+        for record in records:
+            tracer(record)
+
+    tally   = ScoreTally()
+    metrics = Metrics() if args.metrics else None
+    profile = RunProfile() if args.profile else None
+    log     = GameLog(args.log) if args.log else None
+    results = iter_games(args.bot, args.players, args.seed, args.reps, args.workers,
+                         args.stop_early, trace_seeds=args.trace_seeds, on_trace=on_trace,
+                         seeds=seeds, metrics=metrics, profile=profile, log=log)
+    WRITERS[args.format](args.output, args, tallied(results, tally, args.progress), tally)
+    if log:
+        log.close()
+    if metrics:
+        sys.stderr.write(metrics.summary(per=tally.turns) + "\n")
+    if profile:
+        sys.stderr.write("profile written to {} and {}\n".format(*profile.write(args.profile)))
+
+
+if __name__ == "__main__":
+    main()
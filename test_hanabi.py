@@ -1,5 +1,7 @@
+import random
 import unittest
-from hanabi import HanabiGame
+from hanabi import HanabiGame, CARDS, CARD_IDS, CARD_KIND, CARD_BIT, HINT_MASKS, shuffled_deal, \
+    next_seed
 
 
 class HanabiTestCase(unittest.TestCase):
@@ -43,6 +45,166 @@ class HanabiTestCase(unittest.TestCase):
         h.play(1)
         self.assertTrue(h.is_game_over(), "Game is over after three mistakes")
 
+    def test_card_ids_round_trip(self):
+        self.assertEqual(len(CARDS), 50)
+        self.assertEqual(sorted(CARD_IDS.values()), list(range(50)))
+        h = HanabiGame(2, 'aaaaa')
+        self.assertEqual(sorted(h.deck + sum(h.hands, [])), sorted(CARDS))
+
+    def test_info_view_tracks_hints(self):
+        h = HanabiGame(2, 'aaaaa')
+        card = h.hands[1][0]
+        h.inform(1, str(card[1]))
+        self.assertEqual(h.info[1][card]['number'], card[1])
+        self.assertEqual(h.info[1][card]['not_number'], set())
+        other = [c for c in h.game_colours if c != card[0]]
+        for colour in other[:3]:
+            h.inform(1, colour)
+        self.assertIsNone(h.info[1][card]['colour'])
+        self.assertEqual(h.info[1][card]['not_colour'], set(other[:3]))
+        h.inform(1, other[3])
+        self.assertEqual(h.info[1][card]['colour'], card[0])
+        self.assertEqual(h.info[1][card]['not_colour'], set())
+
+    def test_knowledge_kept_per_hand_slot(self):
+        h = HanabiGame(2, 'aaaaa')
+        h.inform(1, "1")
+        h.play(0)
+        self.assertEqual([len(masks) for masks in h.hand_masks], [5, 5])
+        new_card = h.hands[1][-1]
+        self.assertEqual(h.info[1][new_card], {'colour': None, 'number': None,
+                                               'not_colour': set(), 'not_number': set()})
+        self.assertNotIn(h.last_card, h.info[1])
+
+    def test_deal_leaves_global_random_alone(self):
+        random.seed(1)
+        expected = random.random()
+        random.seed(1)
+        h = HanabiGame(2, 'aaaaa')
+        h.random_seed()
+        self.assertEqual(random.random(), expected)
+
+    def test_cached_deal_matches_fresh_deal(self):
+        h1 = HanabiGame(2, 'bbbbb')
+        shuffled_deal.cache_clear()
+        h2 = HanabiGame(2, 'bbbbb')
+        self.assertEqual(h1.deck, h2.deck)
+        h2.rng  # rebuilding the stream from the seed gives the same seeds as the cache
+        self.assertEqual(h1.random_seed(), next_seed('bbbbb'))
+        self.assertEqual(h2.random_seed(), next_seed('bbbbb'))
+        self.assertEqual(h1.random_seed(), h2.random_seed())
+
+    def game_state(self, h):
+        return (h.hands, h.deck, h.table, h.discard_pile, h.clocks, h.lives, h.turn,
+                h.final_turn, [[h.info[i][c] for c in hand] for i, hand in enumerate(h.hands)])
+
+    def play_some_moves(self, h):
+        h.inform(1, "1")
+        h.discard(2)
+        h.inform(0, "red")
+        h.play(0)
+        h.play(4)
+
+    def test_restore_gives_back_identical_state(self):
+        h = HanabiGame(2, 'aaaaa')
+        h.inform(1, "green")
+        before   = self.game_state(h)
+        snapshot = h.snapshot()
+        self.play_some_moves(h)
+        self.assertNotEqual(self.game_state(h), before)
+        h.restore(snapshot)
+        self.assertEqual(self.game_state(h), before)
+        self.play_some_moves(h)
+        h.restore(snapshot)
+        self.assertEqual(self.game_state(h), before, "snapshot can be restored again")
+
+    def test_restore_covers_final_turn(self):
+        h = HanabiGame(2, 'aaaaa')
+        snapshot = h.snapshot()
+        while h.final_turn is None:
+            h.play(0) if h.at_max_clocks() else h.discard(0)
+        h.restore(snapshot)
+        self.assertIsNone(h.final_turn)
+        self.assertEqual(len(h.deck), 40)
+
+    def test_clone_is_independent(self):
+        h = HanabiGame(3, 'aaaaa')
+        before = self.game_state(h)
+        clone  = h.clone()
+        self.play_some_moves(clone)
+        self.assertEqual(self.game_state(h), before)
+        self.play_some_moves(h)
+        self.assertEqual(self.game_state(h), self.game_state(clone))
+
+    def test_max_score_drops_when_last_copy_discarded(self):
+        h = HanabiGame(2, 'eeeee')
+        h.inform(1, "1")
+        h.inform(0, "1")
+        self.assertEqual(h.current_hand()[3], ('yellow', 5, 0))
+        h.discard(3)
+        self.assertEqual(h.max_score(), 24)
+        h.play(0)
+        self.assertEqual(h.score(), 1)
+
+    def test_stop_early_ends_game_once_no_progress_is_possible(self):
+        for stop_early in (False, True):
+            h = HanabiGame(2, 'aaaaa', stop_early=stop_early)
+            h.reach_points, h.reach = 0, [0] * 5
+            self.assertEqual(h.is_game_over(), stop_early)
+            self.assertEqual(bool(h.end_message()), stop_early)
+
+    def test_legal_moves_follow_clocks(self):
+        h = HanabiGame(3, 'aaaaa')
+        self.assertEqual(h.legal_moves()[:5], list(range(5)))
+        self.assertTrue(all(move >= 10 for move in h.legal_moves()[5:]))
+        h.clocks = 0
+        self.assertEqual(h.legal_moves(), list(range(10)))
+
+    def test_hints_must_touch_a_card(self):
+        h = HanabiGame(3, 'aaaaa')
+        for move in range(10, 30):
+            hand_id = 1 + (move - 10) // 10
+            touched = any(CARD_BIT[card] & HINT_MASKS[move % 10] for card in h.hand_ids[hand_id])
+            self.assertEqual(move in h.legal_moves(), touched)
+        self.assertNotIn(h.move_code('2g'), h.legal_moves())  # player 2 holds no green card
+        self.assertIn(h.move_code('2r'), h.legal_moves())
+
+    def test_move_codes_and_strings_agree(self):
+        h = HanabiGame(3, 'aaaaa')
+        h.inform(2, "1")
+        for move in h.legal_moves():
+            self.assertEqual(h.move_code(h.move_string(move)), move)
+        self.assertEqual(h.move_string(h.move_code('3g')), '3g')
+        self.assertEqual(h.move_string(h.move_code('14')), '14')
+        self.assertRaises(ValueError, h.move_code, '2r')  # player 2 can't inform themself
+        for move in ('20', '27', '29', '3x', '2', 'pz'):
+            self.assertRaises(ValueError, h.move_code, move)
+
+    def test_count_index_follows_cards(self):
+        h = HanabiGame(3, 'aaaaa')
+        self.play_some_moves(h)
+        for player_id in range(3):
+            for kind in range(25):
+                in_hands = [c for i, hand in enumerate(h.hands) if i != player_id
+                            for c in hand if CARD_KIND[CARD_IDS[c]] == kind]
+                self.assertEqual(h.count_visible(player_id, kind), len(in_hands))
+        for kind in range(25):
+            discarded = [c for c in h.discard_pile if CARD_KIND[CARD_IDS[c]] == kind]
+            self.assertEqual(h.count_discarded(kind), len(discarded))
+            on_table  = (h.game_colours[kind // 5], kind % 5 + 1) in sum(h.table, [])
+            self.assertEqual(h.count_on_table(kind), int(on_table))
+
+    def test_apply_matches_string_moves(self):
+        h1, h2 = HanabiGame(3, 'aaaaa'), HanabiGame(3, 'aaaaa')
+        for move in ['3g', '14', 'pc', 'db', '3r']:
+            h1.apply(h1.move_code(move))
+            if move[0].isdigit():
+                colour = [c for c in h2.game_colours if c[0] == move[1]]
+                h2.inform(int(move[0]) - 1, colour[0] if colour else move[1])
+            else:
+                getattr(h2, 'play' if move[0] == 'p' else 'discard')("abcde".index(move[1]))
+        self.assertEqual(self.game_state(h1), self.game_state(h2))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from hanabi import HanabiGame, seed_sequence, CARD_IDS
+from hanabibatch import BatchHanabiGame, play_batch
+import hanabibot
+
+
+class BatchHanabiGameTestCase(unittest.TestCase):
+    """Tests for `hanabibatch.py`."""
+
+    def assertSameGame(self, batch, i, hanabi):
+        hands = [[CARD_IDS[c] for c in hand] for hand in hanabi.hands]
+        self.assertEqual([[c for c in hand if c >= 0] for hand in batch.hands[i].tolist()],
+                         hands)
+        self.assertEqual(batch.heights[i].tolist(), hanabi.heights)
+        self.assertEqual(batch.discards[i].tolist(), hanabi.discard_counts)
+        self.assertEqual((batch.clocks[i], batch.lives[i], batch.turn[i]),
+                         (hanabi.clocks, hanabi.lives, hanabi.turn))
+        self.assertEqual(batch.done[i], hanabi.is_game_over())
+        if not hanabi.is_game_over():
+            self.assertEqual(np.flatnonzero(batch.legal_moves_mask()[i]).tolist(),
+                             hanabi.legal_moves())
+        self.assertEqual([[m for m in masks if m] for masks in batch.knowledge[i].tolist()],
+                         hanabi.hand_masks)
+
+    def test_random_moves_match_hanabi_game(self):
+        for num_players in (2, 3, 5):
+            seeds = seed_sequence('aaaaa', 20)
+            batch = BatchHanabiGame(num_players, seeds, rng_seed=1)
+            games = [HanabiGame(num_players, seed) for seed in seeds]
+            while not batch.done.all():
+                moves = hanabibot.HanabiRandomBot.get_batch_moves(batch)
+                for i, hanabi in enumerate(games):
+                    if not hanabi.is_game_over():
+                        hanabi.apply(int(moves[i]))
+                batch.apply(moves)
+                for i, hanabi in enumerate(games):
+                    self.assertSameGame(batch, i, hanabi)
+
+    def test_hints_must_touch_a_card(self):
+        batch  = BatchHanabiGame(2, ['aaaaa'])
+        hanabi = HanabiGame(2, 'aaaaa')
+        self.assertFalse(batch.legal_moves_mask()[0, hanabi.move_code('2r')])  # no red cards
+        self.assertTrue(batch.legal_moves_mask()[0, hanabi.move_code('2y')])
+
+    def test_illegal_move_is_refused(self):
+        batch = BatchHanabiGame(2, ['aaaaa', 'bbbbb'])
+        self.assertRaises(AssertionError, batch.apply, np.array([5, 0]))
+        for code in (-1, -20, 20, 200):  # out of range, or from the end of the mask
+            self.assertRaises(AssertionError, batch.apply, np.array([0, code]))
+        self.assertEqual(batch.turn.tolist(), [0, 0])
+
+    def test_cheat_bot_plays_batch_to_the_end(self):
+        batch = play_batch(hanabibot.HanabiCheatBot, 3, seed_sequence('aaaaa', 50))
+        self.assertTrue(batch.done.all())
+        self.assertGreater(batch.scores().mean(), 20)
+
+    def test_only_bots_with_a_batched_strategy_play_batches(self):
+        self.assertRaises(ValueError, play_batch, hanabibot.HanabiBasicBot, 2, ['aaaaa'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+from hanabi import HanabiGame, CARD_KIND
+from hanabibelief import HanabiBeliefs
+from hanabibot import HanabiBasicBot
+
+
+class HanabiBeliefsTestCase(unittest.TestCase):
+    """Tests for `hanabibelief.py`."""
+
+    def assertMatchesRecount(self, beliefs, hanabi):
+        fresh = HanabiBeliefs(hanabi.clone(), beliefs.player_id)
+        for name in ('unseen', 'masks', 'totals', 'playable', 'junk', 'playable_mask',
+                     'junk_mask'):
+            self.assertEqual(getattr(beliefs, name), getattr(fresh, name), name)
+
+    def test_updates_match_recounting_through_random_games(self):
+        rng = random.Random(0)
+        for seed in ('aaaaa', 'bbbbb', 'ccccc'):
+            hanabi  = HanabiGame(3, seed)
+            beliefs = [HanabiBeliefs(hanabi, p) for p in range(3)]
+            while not hanabi.is_game_over():
+                hanabi.apply(rng.choice(hanabi.legal_moves()))
+                for each in beliefs:
+                    self.assertMatchesRecount(each, hanabi)
+
+    def test_kinds_above_a_lost_card_are_junk(self):
+        hanabi  = HanabiGame(2, 'GcaJJ')  # player 1 starts with both red 4s, in d and e
+        beliefs = HanabiBeliefs(hanabi, 0)
+        for move in (10, 8, 10, 8):
+            hanabi.apply(move)
+        self.assertEqual(hanabi.reach[0], 3)
+        self.assertEqual(beliefs.junk_mask & 0b11000, 0b11000)  # red 4 and red 5
+        self.assertMatchesRecount(beliefs, hanabi)
+        self.assertTrue(all(beliefs.junk_chance(slot) > 0 for slot in range(5)))
+
+    def test_chances(self):
+        hanabi  = HanabiGame(2, 'aaaaa')
+        beliefs = HanabiBeliefs(hanabi, 0)
+        self.assertAlmostEqual(sum(beliefs.distribution(0)), 1)
+        self.assertAlmostEqual(beliefs.playable_chance(0),
+                               sum(beliefs.distribution(0)[colour * 5] for colour in range(5)))
+        self.assertEqual(beliefs.junk_chance(0), 0)
+        card = hanabi.hand_ids[0][2]
+        hanabi.apply(10)                              # player 0 hints player 1
+        hanabi.apply(15 + CARD_KIND[card] % 5)        # player 1 hints player 0 the card's number
+        self.assertEqual(beliefs.masks, hanabi.hand_masks[0])
+        self.assertGreater(beliefs.chance(2, CARD_KIND[card]), 0)
+        self.assertEqual([kind % 5 for kind, chance in enumerate(beliefs.distribution(2))
+                          if chance], [CARD_KIND[card] % 5] * 5)
+
+    def test_bot_beliefs_follow_its_seat(self):
+        hanabi = HanabiGame(2, 'aaaaa')
+        bots   = [HanabiBasicBot(hanabi, player_id=p) for p in range(2)]
+        while hanabi.turn < 10:
+            hanabi.apply(hanabi.move_code(bots[hanabi.current_player_id()].get_move()))
+        self.assertEqual(bots[1].beliefs.player_id, 1)
+        self.assertMatchesRecount(bots[1].beliefs, hanabi)
+        hanabi.apply(hanabi.move_code(bots[0].get_move()))
+        self.assertMatchesRecount(bots[1].beliefs, hanabi)
+
+
+if __name__ == '__main__':
+    unittest.main()
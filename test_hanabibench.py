@@ -0,0 +1,23 @@
+import unittest
+import hanabibench
+
+
+class HanabiBenchTestCase(unittest.TestCase):
+    """Tests for `hanabibench.py`."""
+
+    def test_compare_flags_slowdowns_beyond_threshold(self):
+        baseline = {'deal': {'us': 10.0, 'per': 'game'}, 'step': {'us': 2.0, 'per': 'step'}}
+        results  = {'deal': {'us': 10.5, 'per': 'game'}, 'step': {'us': 2.5, 'per': 'step'},
+                    'play': {'us': 9.0, 'per': 'call'}}
+        self.assertEqual(hanabibench.compare(baseline, results, 0.1), [('step', 2.0, 2.5)])
+        self.assertEqual(hanabibench.compare(baseline, results, 0.3), [])
+
+    def test_suite_times_every_bot(self):
+        results = hanabibench.run_suite(2, 3, repeat=1)
+        for bot_class in hanabibench.bot_classes():
+            self.assertIn(bot_class.__name__ + '.game_5p', results)
+        self.assertTrue(all(result['us'] > 0 for result in results.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
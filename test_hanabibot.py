@@ -0,0 +1,79 @@
+import random
+import unittest
+from itertools import count
+from hanabi import HanabiGame, CARD_BIT
+from hanabibot import HanabiBotBase, HanabiBasicBot, HanabiRolloutBot, sample_hand, \
+    run_rollouts, rollout_pools, close_rollout_pools
+
+
+class SampledRolloutBot(HanabiRolloutBot):
+    time_budget = None
+    samples     = 4
+
+
+class HanabiBotTestCase(unittest.TestCase):
+    """Tests for `hanabibot.py`."""
+
+    def bot_view(self, bot):
+        return (bot.my_info, bot.next_hand, bot.next_info, bot.playable_cards,
+                bot.my_playable_cards, bot.clocks, bot.discard_pile)
+
+    def test_persistent_view_matches_fresh_view(self):
+        for num_players in (2, 4):
+            h    = HanabiGame(num_players, 'aaaaa')
+            bots = [HanabiBasicBot(h, player_id=p) for p in range(num_players)]
+            while not h.is_game_over():
+                for p, bot in enumerate(bots):
+                    self.assertEqual(self.bot_view(bot),
+                                     self.bot_view(HanabiBasicBot(h, player_id=p)))
+                h.apply(h.move_code(bots[h.current_player_id()].get_move()))
+
+    def test_init_cant_be_overridden(self):
+        class BadBot(HanabiBotBase):
+            def __init__(self, hanabi):
+                super().__init__(hanabi)
+        self.assertRaises(Exception, BadBot, HanabiGame(2, 'aaaaa'))
+
+    def test_sampled_hands_fit_what_their_player_knows(self):
+        h = HanabiGame(3, 'aaaaa')
+        for move in (13, 5, 10, 0):
+            h.apply(move)
+        unseen = sorted(h.deck_ids + h.hand_ids[1])
+        for seed in range(20):
+            game = h.clone()
+            sample_hand(game, 1, random.Random(seed))
+            self.assertEqual(sorted(game.deck_ids + game.hand_ids[1]), unseen)
+            for card, mask in zip(game.hand_ids[1], game.hand_masks[1]):
+                self.assertTrue(CARD_BIT[card] & mask)
+            self.assertEqual(game.in_hand_counts, [sum(c) for c in zip(*game.hand_counts)])
+
+    def test_rollouts_keep_to_time_budget(self):
+        h          = HanabiGame(2, 'aaaaa', stop_early=True)
+        candidates = h.legal_moves()[:3]
+        clock      = count().__next__  # a second passes each time the clock is looked at
+        totals, counts = run_rollouts(h, 0, candidates, time_budget=2.5, rng=random.Random(1),
+                                      clock=clock)
+        self.assertEqual(counts, [2, 1, 1])  # the first sample isn't timed, every move gets one
+        totals, counts = run_rollouts(h, 0, candidates, samples=2, rng=random.Random(1))
+        self.assertEqual(counts, [2, 2, 2])
+        self.assertEqual(h.snapshot()[:4], HanabiGame(2, 'aaaaa').snapshot()[:4])
+
+    def test_sampled_rollout_bot_is_repeatable(self):
+        runs = []
+        for workers in (1, 1, 2, 2):
+            bot_class = type('Bot', (SampledRolloutBot,), {'workers': workers})
+            h     = HanabiGame(2, 'aaaaa')
+            bots  = [bot_class(h, player_id=p) for p in range(2)]
+            moves = []
+            for _ in range(6):
+                moves.append(bots[h.current_player_id()].get_move())
+                h.apply(moves[-1])
+            runs.append(moves)
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(runs[2], runs[3])
+        close_rollout_pools()
+        self.assertEqual(rollout_pools, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
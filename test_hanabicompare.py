@@ -0,0 +1,43 @@
+import unittest
+from hanabibot import HanabiBasicBot, HanabiCheatBot, HanabiRandomBot
+from hanabirunner import run_games
+from hanabicompare import z_score, compare_bots, iter_pairs
+
+
+class HanabiCompareTestCase(unittest.TestCase):
+    """Tests for `hanabicompare.py`."""
+
+    def test_z_score(self):
+        self.assertAlmostEqual(z_score(0.025), 1.95996, places=4)
+        self.assertAlmostEqual(z_score(0.5), 0.0, places=6)
+
+    def test_pairs_share_seeds_with_runs(self):
+        pairs  = [pair for chunk in iter_pairs(HanabiBasicBot, HanabiRandomBot, 2, 'aaaaa', 6,
+                                               workers=2, chunk_size=4) for pair in chunk]
+        basic  = run_games(HanabiBasicBot, 2, 'aaaaa', 6, workers=1)
+        random = run_games(HanabiRandomBot, 2, 'aaaaa', 6, workers=1)
+        self.assertEqual([a.score for a, b in pairs], [r.score for r in basic])
+        self.assertEqual([b.score for a, b in pairs], [r.score for r in random])
+
+    def test_stops_once_clear(self):
+        checks = []
+        tally, decision = compare_bots(HanabiRandomBot, HanabiBasicBot, 2, 'aaaaa',
+                                       max_reps=1000, min_reps=20, workers=1, chunk_size=10,
+                                       on_check=checks.append)
+        self.assertEqual(decision, 'B')
+        self.assertEqual(tally.games, 20)
+        self.assertEqual(len(checks), 1)
+        tally, decision = compare_bots(HanabiBasicBot, HanabiBasicBot, 2, 'aaaaa',
+                                       max_reps=1000, min_reps=20, workers=1, chunk_size=10)
+        self.assertEqual((decision, tally.mean), ('level', 0.0))
+
+    def test_gives_up_at_max_reps(self):
+        tally, decision = compare_bots(HanabiBasicBot, HanabiCheatBot, 2, 'aaaaa',
+                                       max_reps=30, min_reps=10, alpha=1e-100, workers=1,
+                                       chunk_size=10)
+        self.assertEqual(tally.games, 30)
+        self.assertIsNone(decision)
+
+
+if __name__ == '__main__':
+    unittest.main()
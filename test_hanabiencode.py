@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from hanabi import HanabiGame, seed_sequence
+from hanabibatch import BatchHanabiGame
+from hanabibot import HanabiRandomBot
+from hanabiencode import ObservationEncoder, BatchHanabiEnv, encode_game, legal_moves_mask, \
+    layout
+
+
+class HanabiEncodeTestCase(unittest.TestCase):
+    """Tests for `hanabiencode.py`."""
+
+    def test_batch_observations_match_encode_game(self):
+        for num_players in (2, 4):
+            seeds   = seed_sequence('aaaaa', 8)
+            batch   = BatchHanabiGame(num_players, seeds, rng_seed=1)
+            games   = [HanabiGame(num_players, seed) for seed in seeds]
+            encoder = ObservationEncoder(num_players, len(seeds))
+            buffers = encoder.observations, encoder.legal
+            other   = np.full(len(seeds), 1)
+            while not batch.done.all():
+                observations, legal = encoder.encode(batch)
+                self.assertTrue(observations is buffers[0] and legal is buffers[1])
+                for i, hanabi in enumerate(games):
+                    np.testing.assert_array_equal(observations[i], encode_game(hanabi))
+                    np.testing.assert_array_equal(legal[i], legal_moves_mask(hanabi))
+                observations, legal = encoder.encode(batch, other)
+                for i, hanabi in enumerate(games):
+                    np.testing.assert_array_equal(observations[i], encode_game(hanabi, 1))
+                moves = HanabiRandomBot.get_batch_moves(batch)
+                for i, hanabi in enumerate(games):
+                    if not hanabi.is_game_over():
+                        hanabi.apply(int(moves[i]))
+                batch.apply(moves)
+
+    def test_layout(self):
+        slices, size = layout(3)
+        self.assertEqual(size, 5 * 5 * 25 + 53)
+        self.assertEqual(slices['knowledge'][0], slice(250, 625))
+        hanabi = HanabiGame(3, 'aaaaa')
+        view   = encode_game(hanabi)[slices['hands'][0]].reshape(slices['hands'][1])
+        self.assertEqual(view.sum(), 10)
+        np.testing.assert_allclose(encode_game(hanabi)[-3:], [1, 1, 35 / 50], rtol=1e-6)
+
+    def test_env_deals_new_games_as_old_ones_finish(self):
+        env = BatchHanabiEnv(2, 16, 'aaaaa')
+        observations, legal = env.reset()
+        totals = np.zeros(16)
+        scores = []
+        while env.finished < 40:
+            observations, legal, rewards, dones = env.step(HanabiRandomBot.get_batch_moves(
+                                                           env.batch))
+            totals += rewards
+            scores.extend(env.final_scores[dones].tolist())
+            self.assertEqual(totals[dones].tolist(), env.final_scores[dones].tolist())
+            totals[dones] = 0
+            self.assertFalse(env.batch.done.any())
+            self.assertTrue(legal.any(axis=1).all())
+        self.assertEqual(len(scores), env.finished)
+        self.assertEqual(len(set(env.batch.seeds)), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
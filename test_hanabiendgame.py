@@ -0,0 +1,15 @@
+import unittest
+from hanabibot import HanabiBasicBot
+from hanabiendgame import play_to_endgame
+
+
+class HanabiEndgameTestCase(unittest.TestCase):
+    """Tests for `hanabiendgame.py`."""
+
+    def test_endgame_bound(self):
+        result = play_to_endgame(HanabiBasicBot, 4, 'aaaaa')
+        self.assertGreaterEqual(result.best, result.score)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import unittest
+import tempfile
+from hanabibot import HanabiBasicBot, HanabiRandomBot
+from hanabirunner import run_games
+from hanabilog import GameLog, GameRecord, replay
+
+
+class HanabiLogTestCase(unittest.TestCase):
+    """Tests for `hanabilog.py`."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path      = os.path.join(self.directory.name, 'games.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_logged_games_replay_to_their_results(self):
+        with GameLog(self.path) as log:
+            results = run_games(HanabiBasicBot, 3, 'aaaaa', 12, workers=2, chunk_size=5, log=log)
+            self.assertEqual(len(log), 12)
+            self.assertEqual([record.seed for record in log], [r.seed for r in results])
+            for record in log:
+                hanabi = replay(record)
+                self.assertEqual((hanabi.score(), hanabi.lives), (record.score, record.lives))
+                self.assertTrue(hanabi.is_game_over())
+
+    def test_find_by_outcome_and_bot(self):
+        with GameLog(self.path) as log:
+            basic  = run_games(HanabiBasicBot, 2, 'aaaaa', 10, workers=1, log=log)
+            random = run_games(HanabiRandomBot, 2, 'aaaaa', 10, workers=1, log=log)
+        with GameLog(self.path) as log:
+            score = basic[3].score
+            self.assertEqual([r.seed for r in log.find(score=score, bot='HanabiBasicBot')],
+                             [r.seed for r in basic if r.score == score])
+            died = [r.seed for r in random if r.lives == -1]
+            self.assertEqual([r.seed for r in log.find(lives=-1, bot='HanabiRandomBot')], died)
+            entries = list(log.entries())
+            log.reindex()
+            self.assertEqual(list(log.entries()), entries)
+
+    def test_replay_refuses_illegal_moves(self):
+        for moves in ([20], [10, 200], [5]):
+            record = GameRecord('aaaaa', 'HanabiBasicBot', 2, 0, 2, moves)
+            self.assertRaises(ValueError, replay, record)
+
+    def test_refuses_other_files(self):
+        with open(self.path, 'w') as file:
+            file.write("not a log")
+        self.assertRaises(ValueError, GameLog, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
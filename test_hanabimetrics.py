@@ -0,0 +1,32 @@
+import unittest
+from hanabi import HanabiGame
+from hanabibot import HanabiBasicBot
+from hanabimetrics import instrumented, Metrics
+from hanabirunner import play_game, run_games
+
+
+class HanabiMetricsTestCase(unittest.TestCase):
+    """Tests for `hanabimetrics.py`."""
+
+    def test_instrumented_counts_calls_and_restores_methods(self):
+        play = HanabiGame.play
+        with instrumented() as metrics:
+            self.assertIsNot(HanabiGame.play, play)
+            result = play_game(HanabiBasicBot, 2, 'aaaaa')
+        self.assertIs(HanabiGame.play, play)
+        moves = metrics['HanabiBasicBot.get_move'].count
+        self.assertEqual(moves, result.turns)
+        self.assertEqual(metrics['HanabiBotBase.__init__'].count, 2)
+        self.assertGreater(metrics['HanabiGame.play'].total, 0)
+        self.assertIn('HanabiBasicBot.will_play_idx', metrics.summary(per=moves))
+
+    def test_worker_metrics_are_merged(self):
+        metrics = Metrics()
+        results = run_games(HanabiBasicBot, 2, 'aaaaa', 6, workers=2, chunk_size=2,
+                            metrics=metrics)
+        self.assertEqual(metrics['HanabiBasicBot.get_move'].count, sum(r.turns for r in results))
+        self.assertFalse(Metrics())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import random
+import unittest
+import tempfile
+from hanabi import iter_seeds
+from hanabioracle import OracleIndex, oracle_record, deck_features, adjusted_mean, corpus_id, \
+    RECORD
+
+
+class HanabiOracleTestCase(unittest.TestCase):
+    """Tests for `hanabioracle.py`."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path      = os.path.join(self.directory.name, 'seeds.idx')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_deck_features(self):
+        ones_dealt, fives_late, kinds_late, all_seen = deck_features('aaaaa', 2)
+        self.assertTrue(0 <= ones_dealt <= 10)
+        self.assertTrue(0 <= fives_late <= 5)
+        self.assertTrue(kinds_late <= 10)
+        self.assertTrue(25 <= all_seen <= 50)
+        self.assertRaises(ValueError, oracle_record, 'toolongseed', 2)
+
+    def test_build_carries_on_after_a_stop(self):
+        corpus = list(iter_seeds('aaaaa', 12))
+        with OracleIndex(self.path, 2) as index:
+            index.build(corpus[:5], workers=1, chunk_size=2)
+        with open(self.path, 'ab') as file:
+            file.write(b'\0' * (RECORD.size // 2))  # a record cut off part way
+        with OracleIndex(self.path) as index:
+            self.assertEqual(len(index), 5)
+            index.build(corpus, workers=2, chunk_size=4)
+            records = list(index)
+        self.assertEqual([record.seed for record in records], corpus)
+        self.assertEqual(records[7], oracle_record(corpus[7], 2))
+        self.assertTrue(all(record.oracle >= record.score for record in records))
+        self.assertRaises(ValueError, OracleIndex, self.path, 3)
+
+    def test_refuses_to_carry_on_with_another_corpus(self):
+        with OracleIndex(self.path, 2, corpus_id('aaaaa')) as index:
+            index.build(iter_seeds('aaaaa', 4), workers=1)
+        self.assertRaises(ValueError, OracleIndex, self.path, 2, corpus_id('bbbbb'))
+        listed = list(iter_seeds('aaaaa', 6))
+        self.assertRaises(ValueError, OracleIndex, self.path, 2, corpus_id(seeds=listed))
+        with OracleIndex(self.path, 2, corpus_id('aaaaa')) as index:
+            self.assertEqual(index.corpus, 'run:aaaaa')
+            self.assertRaises(ValueError, index.build, iter_seeds('bbbbb', 8), 1)
+            index.build(iter_seeds('aaaaa', 6), workers=1)
+            self.assertEqual([record.seed for record in index], listed)
+            index.build(iter_seeds('aaaaa', 3), workers=1)  # a shorter corpus adds nothing
+            self.assertEqual(len(index), 6)
+
+    def test_stratified_sample_and_control_variate(self):
+        with OracleIndex(self.path, 2) as index:
+            index.build(iter_seeds('aaaaa', 30), workers=1)
+            records = index.records()
+            strata  = index.strata()
+            sample  = index.stratified_sample(10, random.Random(0))
+        self.assertEqual(set(strata), {record.oracle for record in records.values()})
+        self.assertEqual(len(set(sample)), len(sample))
+        self.assertEqual({records[seed].oracle for seed in sample}, set(strata))
+        self.assertEqual(adjusted_mean([20, 22, 24], [23, 24, 25], 24), 22)
+        self.assertEqual(adjusted_mean([20, 22, 24], [23, 24, 25], 25), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import pstats
+import unittest
+import tempfile
+from hanabibot import HanabiBasicBot
+from hanabiprofile import RunProfile
+from hanabirunner import run_games
+
+
+class HanabiProfileTestCase(unittest.TestCase):
+    """Tests for `hanabiprofile.py`."""
+
+    def test_worker_profiles_are_merged_and_written(self):
+        profile = RunProfile()
+        results = run_games(HanabiBasicBot, 2, 'aaaaa', 8, workers=2, chunk_size=2,
+                            profile=profile)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = profile.write(os.path.join(directory, 'run'))
+            stats = pstats.Stats(paths[0]).stats
+            calls = {func[2]: stat[1] for func, stat in stats.items()}
+            self.assertEqual(calls['get_move'], sum(r.turns for r in results))
+            self.assertEqual(calls['play_game'], 8)
+            with open(paths[1]) as file:
+                for line in file:
+                    stack, count = line.rsplit(' ', 1)
+                    self.assertTrue(stack.startswith('hanabirunner.py:play_games'))
+                    self.assertGreater(int(count), 0)
+        self.assertIn('will_play_idx', profile.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
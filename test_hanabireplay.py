@@ -0,0 +1,69 @@
+import os
+import json
+import unittest
+import tempfile
+from unittest import mock
+from hanabibot import HanabiBasicBot
+from hanabirunner import run_games
+from hanabilog import GameLog
+from hanabireplay import ReplayRecord, replay_game, iter_replays, server_file_records, \
+    game_log_records
+
+
+class HanabiReplayTestCase(unittest.TestCase):
+    """Tests for `hanabireplay.py`."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_logged_games_verify_in_parallel(self):
+        path = os.path.join(self.directory.name, 'games.log')
+        with GameLog(path) as log:
+            results = run_games(HanabiBasicBot, 3, 'aaaaa', 12, workers=1, log=log)
+        serial   = list(iter_replays(game_log_records(path), workers=1))
+        parallel = list(iter_replays(game_log_records(path), workers=2, chunk_size=5))
+        self.assertEqual(serial, parallel)
+        self.assertEqual([(r.seed, r.score, r.lives) for r in serial],
+                         [(r.seed, r.score, r.lives) for r in results])
+        self.assertTrue(all(r.over and r.error is None for r in serial))
+
+    def test_server_file_moves_and_illegal_moves(self):
+        path = os.path.join(self.directory.name, 'gamefiles.json')
+        with open(path, 'w') as file:
+            json.dump({'good': {'seed': 'abc', 'num_players': 2, 'moves': ['2y', 'pa', 'db']},
+                       'bad':  {'seed': 'abc', 'num_players': 2, 'moves': ['2y', 'pa', 'px']}},
+                      file)
+        results = {r.name: r for r in iter_replays(server_file_records(path), workers=1)}
+        self.assertIsNone(results['good'].error)
+        self.assertEqual(results['good'].turns, 3)
+        self.assertFalse(results['good'].over)
+        self.assertEqual(results['bad'].turns, 2)
+        self.assertIn("illegal move 'px'", results['bad'].error)
+
+    def test_illegal_move_codes(self):
+        for moves, bad in (([20, 25], 20), ([11, 200], 200), ([-3], -3), ([5], 5),
+                           (['2y', '10'], '10'), ([10], 10)):
+            result = replay_game(ReplayRecord('x', 'aaaaa', 2, moves, None))
+            self.assertIn("illegal move {!r}".format(bad), result.error)
+            self.assertEqual(result.turns, moves.index(bad))
+
+    def test_error_without_a_message_names_its_type(self):
+        with mock.patch('hanabi.HanabiGame.move_code', side_effect=IndexError):
+            result = replay_game(ReplayRecord('x', 'aaaaa', 2, ['pa'], None))
+        self.assertEqual(result.error, "illegal move 'pa' at turn 0: IndexError")
+
+    def test_mismatched_outcome_and_checksum(self):
+        moves  = ['2y', 'pa', 'db']
+        result = replay_game(ReplayRecord('x', 'abc', 2, moves, (25, 3)))
+        self.assertIn("recorded as 25 and 3", result.error)
+        other  = replay_game(ReplayRecord('y', 'abc', 2, moves, None))
+        self.assertEqual(result.checksum, other.checksum)
+        self.assertNotEqual(result.checksum,
+                            replay_game(ReplayRecord('z', 'abc', 2, moves[:2], None)).checksum)
+
+
+if __name__ == '__main__':
+    unittest.main()
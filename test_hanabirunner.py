@@ -0,0 +1,62 @@
+import unittest
+from statistics import mean, median, stdev
+from hanabi import HanabiGame
+from hanabibot import HanabiBasicBot, HanabiRandomBot
+from hanabirunner import run_games, play_game, ScoreTally
+
+
+class HanabiRunnerTestCase(unittest.TestCase):
+    """Tests for `hanabirunner.py`."""
+
+    def test_run_follows_random_seed_chain(self):
+        results = run_games(HanabiRandomBot, 3, 'aaaaa', 5, workers=1)
+        seed    = 'aaaaa'
+        for result in results:
+            self.assertEqual(result[:4], play_game(HanabiRandomBot, 3, seed)[:4])
+            seed = HanabiGame(3, seed).random_seed()
+
+    def test_parallel_run_matches_serial_run(self):
+        serial   = run_games(HanabiBasicBot, 2, 'aaaaa', 30, workers=1)
+        parallel = run_games(HanabiBasicBot, 2, 'aaaaa', 30, workers=3, chunk_size=4)
+        self.assertEqual([r[:4] for r in parallel], [r[:4] for r in serial])
+        self.assertEqual(len(serial), 30)
+
+    def test_explicit_seeds_are_played_in_order(self):
+        seeds = ['ccccc', 'aaaaa', 'bbbbb', 'aaaaa']
+        results = run_games(HanabiRandomBot, 2, seeds=seeds, workers=2, chunk_size=1)
+        self.assertEqual([r.seed for r in results], seeds)
+        self.assertEqual(results[1][:4], results[3][:4])
+
+    def test_only_chosen_seeds_are_traced(self):
+        traces = []
+        results = run_games(HanabiBasicBot, 2, 'aaaaa', 10, workers=2, chunk_size=3,
+                            trace_seeds=['Or3sD', 'nope!'],
+                            on_trace=lambda seed, records: traces.append((seed, records)))
+        self.assertIn('Or3sD', [r[0] for r in results])
+        self.assertEqual([seed for seed, records in traces], ['Or3sD'])
+        records = traces[0][1]
+        self.assertTrue(records)
+        self.assertEqual(set(r['event'] for r in records), {'thought'})
+        self.assertEqual(records[0]['turn'], 0)
+
+    def test_tally_matches_statistics(self):
+        results = [('s{}'.format(i), (i * 7) % 26, i % 5 - 2) for i in range(101)]
+        for games in (results, results[:-1]):
+            scores = [r[1] for r in games]
+            tally  = ScoreTally(games)
+            self.assertEqual(tally.median(), median(scores))
+            self.assertAlmostEqual(tally.mean, mean(scores))
+            self.assertAlmostEqual(tally.stdev(), stdev(scores))
+            self.assertEqual(tally.quantile(0), min(scores))
+            self.assertEqual(tally.quantile(1), max(scores))
+            self.assertEqual(tally.died, len([r for r in games if r[2] < 0]))
+            self.assertEqual(tally.examples[7], 's1')
+
+    def test_empty_tally_renders(self):
+        self.assertEqual(ScoreTally().render(), "no games played")
+        self.assertEqual(ScoreTally(run_games(HanabiBasicBot, 2, seeds=[], workers=1)).render(),
+                         "no games played")
+
+
+if __name__ == '__main__':
+    unittest.main()
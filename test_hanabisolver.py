@@ -0,0 +1,57 @@
+import unittest
+from unittest import mock
+from hanabi import HanabiGame, CARD_KIND, iter_seeds
+from hanabibot import HanabiBasicBot
+from hanabisolver import EndgameSolver, solve, solve_fair, arrangements
+
+
+def play_to_empty_deck(num_players, seed):
+    hanabi = HanabiGame(num_players, seed)
+    bots   = [HanabiBasicBot(hanabi, player_id=p) for p in range(num_players)]
+    while not hanabi.is_game_over() and hanabi.final_turn is None:
+        hanabi.apply(hanabi.move_code(bots[hanabi.current_player_id()].get_move()))
+    return hanabi
+
+
+def brute_force(hanabi):
+    """returns the best final score over every line of legal moves"""
+    if hanabi.is_game_over():
+        return hanabi.score()
+    best     = hanabi.score()
+    snapshot = hanabi.snapshot()
+    for move in hanabi.legal_moves():
+        hanabi.apply(move)
+        best = max(best, brute_force(hanabi))
+        hanabi.restore(snapshot)
+    return best
+
+
+class HanabiSolverTestCase(unittest.TestCase):
+    """Tests for `hanabisolver.py`."""
+
+    def test_solve_matches_brute_force(self):
+        for seed in iter_seeds('bbbbb', 10):
+            hanabi = play_to_empty_deck(2, seed)
+            if hanabi.is_game_over():
+                continue
+            solution = solve(hanabi)
+            self.assertEqual(solution.score, brute_force(hanabi.clone()))
+            hanabi.apply(solution.move)
+            self.assertEqual(solve(hanabi).score, solution.score)
+
+    def test_fair_solve_knows_less(self):
+        hanabi = play_to_empty_deck(3, 'bbbbb')
+        hand   = [CARD_KIND[card] for card in hanabi.hand_ids[hanabi.current_player_id()]]
+        self.assertIn(hand, arrangements(hanabi, hanabi.current_player_id()))
+        self.assertLessEqual(solve_fair(hanabi).score, solve(hanabi).score)
+        self.assertRaises(ValueError, solve, HanabiGame(2, 'bbbbb'))
+
+    def test_time_limit(self):
+        hanabi = play_to_empty_deck(5, 'bbbbb')
+        with mock.patch('hanabisolver.CHECK_EVERY', 1):
+            self.assertIsNone(solve(hanabi, EndgameSolver(time_limit=0)))
+            self.assertIsNotNone(solve(hanabi, EndgameSolver(time_limit=10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import inspect
+import unittest
+import tempfile
+from unittest import mock
+import hanabi
+import hanabibot
+from hanabibot import HanabiBasicBot, HanabiCheatBot, HanabiRandomBot, HanabiRolloutBot
+from hanabirunner import play_game, run_games
+from hanabitournament import ResultCache, run_tournament, tally_games, bot_modules, \
+    bot_helpers, bot_version
+
+
+class HanabiTournamentTestCase(unittest.TestCase):
+    """Tests for `hanabitournament.py`."""
+
+    def test_mixed_seats(self):
+        basic = run_games(HanabiBasicBot, 3, 'aaaaa', 1, workers=1)[0]
+        mixed = play_game([HanabiBasicBot] * 3, 3, 'aaaaa')
+        self.assertEqual(basic[:4], mixed[:4])
+
+    def test_round_robin_over_workers(self):
+        bots     = [HanabiBasicBot, HanabiCheatBot]
+        games    = run_tournament(bots, 2, 'aaaaa', 5, workers=2, chunk_size=3)
+        serial   = run_tournament(bots, 2, 'aaaaa', 5, workers=1)
+        self.assertEqual(games, serial)
+        self.assertEqual(len(games), 20)
+        self.assertEqual({game.seating for game in games[:4]},
+                         {(a, b) for a in bots for b in bots})
+        by_bot, by_pairing, by_seating = tally_games(games)
+        self.assertEqual(by_bot['HanabiBasicBot'].games, 15)
+        self.assertEqual(by_pairing[('HanabiBasicBot', 'HanabiCheatBot')].games, 10)
+        self.assertEqual(by_seating[('HanabiCheatBot', 'HanabiCheatBot')].games, 5)
+        random = run_tournament(bots, 2, 'aaaaa', 5, seating='random', workers=1)
+        self.assertEqual([game.seed for game in random], [game.seed for game in games[::4]])
+        self.assertTrue(set(random) <= set(games))
+
+    def changed_source(self, changed):
+        """patches inspect.getsource so the source of changed reads as if it had been edited"""
+        getsource = inspect.getsource
+        return mock.patch('inspect.getsource',
+                          lambda obj: getsource(obj) + ("#" if obj is changed else ""))
+
+    def test_cache_replays_only_changed_bots(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path  = os.path.join(directory, 'cache.json')
+            bots  = [HanabiBasicBot, HanabiCheatBot]
+            games = run_tournament(bots, 2, 'aaaaa', 3, workers=1, cache=ResultCache(path))
+            cache = ResultCache(path)
+            self.assertEqual(run_tournament(bots, 2, 'aaaaa', 3, workers=1, cache=cache), games)
+            self.assertEqual(cache.added, 0)
+            with self.changed_source(HanabiCheatBot):
+                cache = ResultCache(path)
+                run_tournament(bots, 2, 'aaaaa', 3, workers=1, cache=cache)
+            self.assertEqual(cache.added, 9)
+
+    def test_editing_a_bot_leaves_other_bots_versions(self):
+        bots     = [HanabiBasicBot, HanabiCheatBot, HanabiRandomBot, HanabiRolloutBot]
+        versions = {bot: bot_version(bot) for bot in bots}
+        with self.changed_source(HanabiBasicBot):
+            changed = {bot for bot in bots if bot_version(bot) != versions[bot]}
+        self.assertEqual(changed, {HanabiBasicBot, HanabiRolloutBot})
+        with self.changed_source(hanabibot.rollout_move):
+            changed = {bot for bot in bots if bot_version(bot) != versions[bot]}
+        self.assertEqual(changed, {HanabiRolloutBot})
+
+    def test_version_covers_the_modules_a_bot_uses(self):
+        names = [module.__name__ for module in bot_modules(HanabiRolloutBot)]
+        self.assertEqual(names, ['hanabi', 'hanabibelief', 'hanabisolver'])
+        helpers = [name for name, value in bot_helpers(HanabiRolloutBot)]
+        for name in ('hanabibot.HanabiBasicBot', 'hanabibot.kind_masks', 'hanabibot.HORIZON'):
+            self.assertIn(name, helpers)
+        version = bot_version(HanabiBasicBot)
+        with self.changed_source(hanabi):
+            self.assertNotEqual(bot_version(HanabiBasicBot), version)
+        self.assertEqual(bot_version(HanabiBasicBot), version)
+
+
+if __name__ == '__main__':
+    unittest.main()
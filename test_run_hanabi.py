@@ -0,0 +1,36 @@
+import csv
+import json
+import unittest
+from io import StringIO
+from unittest import mock
+
+import run_hanabi
+
+
+class RunHanabiTestCase(unittest.TestCase):
+    """Tests for `run_hanabi.py`."""
+
+    def run_main(self, *argv):
+        output = StringIO()
+        with mock.patch('sys.stdout', output):
+            run_hanabi.main(list(argv))
+        return output.getvalue()
+
+    def test_json_report(self):
+        report = json.loads(self.run_main('BasicBot', '--seed', 'aaaaa', '--reps', '4',
+                                          '--workers', '1'))
+        self.assertEqual(report['bot'], 'HanabiBasicBot')
+        self.assertEqual([g['seed'] for g in report['games']][:2], ['aaaaa', 'Or3sD'])
+        self.assertEqual(report['summary']['games'], 4)
+
+    def test_csv_matches_json(self):
+        args  = ('HanabiCheatBot', '--players', '3', '--seed', 'aaaaa', '--reps', '3',
+                 '--workers', '1')
+        rows  = list(csv.DictReader(StringIO(self.run_main(*args + ('--format', 'csv')))))
+        games = json.loads(self.run_main(*args))['games']
+        self.assertEqual([(r['seed'], int(r['score']), int(r['turns'])) for r in rows],
+                         [(g['seed'], g['score'], g['turns']) for g in games])
+
+
+if __name__ == '__main__':
+    unittest.main()